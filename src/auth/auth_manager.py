@@ -158,6 +158,10 @@ class AuthManager:
                 self.supabase.auth.sign_out()
                 print("✅ User signed out successfully")
                 
+            # Stop this session's in-flight AI requests before their handles are dropped
+            for job in st.session_state.get("ai_jobs", {}).values():
+                job["cancel_token"].cancel()
+            
             # Clear all session state
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
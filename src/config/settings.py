@@ -3,6 +3,8 @@ Configuration Management for The Third Voice AI
 Centralized settings and secrets management
 """
 
+import os
+
 import streamlit as st
 
 
@@ -19,6 +21,129 @@ class AppConfig:
     CACHE_EXPIRY_DAYS = 7
     MOBILE_BREAKPOINT = 768
     
+    # HTTP connection pooling for the shared AI engine session
+    HTTP_POOL_CONNECTIONS = 4   # Number of per-host pools kept alive
+    HTTP_POOL_MAXSIZE = 20      # Max keep-alive connections per host
+    ASYNC_HTTP_MAX_CONNECTIONS = 200  # Concurrent connections for the async API
+    
+    # In-process response cache (sits in front of the Supabase cache table)
+    RESPONSE_CACHE_MAX_ENTRIES = 2000
+    RESPONSE_CACHE_TTL_SECONDS = 6 * 60 * 60
+    
+    # Persistent on-disk response cache shared by worker processes on this node (SQLite)
+    DISK_CACHE_ENABLED = True
+    DISK_CACHE_PATH = ".cache/third_voice_responses.sqlite3"
+    DISK_CACHE_MAX_ENTRIES = 50000
+    DISK_CACHE_TTL_SECONDS = CACHE_EXPIRY_DAYS * 24 * 60 * 60
+    
+    # Background warm-up of the demo/onboarding example messages for every relationship context
+    CACHE_WARMUP_ENABLED = True
+    CACHE_WARMUP_EXAMPLES = [                 # (message, message_type)
+        ("I'm frustrated that you never help with chores", "transform"),
+        ("You never appreciate anything I do!", "interpret")
+    ]
+    CACHE_WARMUP_INTERVAL_SECONDS = 15 * 60   # How often expired or evicted examples are regenerated
+    CACHE_WARMUP_PACING_SECONDS = 3.0         # Pause after each model call
+    
+    # Near-duplicate cache for interpretations (SimHash similarity within one user, context and mode)
+    SIMILARITY_CACHE_ENABLED = False
+    SIMILARITY_CACHE_MAX_ENTRIES = 500000
+    SIMILARITY_THRESHOLD = 0.85   # 1 - hamming distance / 64 bits
+    SIMILARITY_MIN_TOKENS = 4     # Shorter messages only use exact matches
+    
+    # Hedged requests: start the next model if the current one is slow
+    HEDGE_ENABLED = True
+    HEDGE_DELAY_SECONDS = 4.0   # Latency threshold before hedging
+    HEDGE_MAX_IN_FLIGHT = 2     # Max models racing for one request
+    HEDGE_MAX_WORKERS = 16      # Shared worker threads across requests
+    
+    # Model health scoreboard and circuit breaker
+    MODEL_HEALTH_WINDOW = 20             # Recent calls used for the success rate
+    MODEL_LATENCY_EWMA_ALPHA = 0.3       # Weight of the newest latency sample
+    MODEL_DEFAULT_LATENCY_SECONDS = 5.0  # Assumed latency for untried models
+    CIRCUIT_FAILURE_THRESHOLD = 3        # Consecutive failures that open the circuit
+    CIRCUIT_COOLDOWN_SECONDS = 60        # Time before a half-open trial call
+    
+    # Background model health probes (replace per-instance prewarming)
+    HEALTH_PROBE_ENABLED = True
+    HEALTH_PROBE_TTL_SECONDS = 10 * 60     # Probe a model at most once per TTL
+    HEALTH_PROBE_INTERVAL_SECONDS = 30     # How often the prober checks for due models
+    
+    # Process-wide rate limiting (OpenRouter free models allow ~20 requests/minute)
+    RATE_LIMIT_MODEL_PER_MINUTE = 20
+    RATE_LIMIT_MODEL_BURST = 5
+    RATE_LIMIT_KEY_PER_MINUTE = 60
+    RATE_LIMIT_KEY_BURST = 10
+    RATE_LIMIT_MAX_WAIT_SECONDS = 2.0      # Skip a model rather than queue longer than this
+    RATE_LIMIT_DEFAULT_RETRY_AFTER = 10.0  # Hold-off for a 429 without Retry-After
+    
+    # Request JSON structured output from models that support response_format
+    STRUCTURED_OUTPUT_ENABLED = True
+    
+    # Stream model output into the UI as it is generated
+    STREAMING_ENABLED = True
+    
+    # Show an instant rule-based draft until the model answer replaces it
+    PROGRESSIVE_DRAFT_ENABLED = True
+    
+    # Identical concurrent requests (same cache key) wait on one upstream call
+    SINGLE_FLIGHT_ENABLED = True
+
+    # Background worker pool so model calls don't block the Streamlit script thread
+    BACKGROUND_JOBS_ENABLED = True
+    JOB_WORKERS = 8
+    JOB_MAX_PENDING = 64               # Unfinished jobs accepted before running inline
+    JOB_RESULT_TTL_SECONDS = 10 * 60   # Finished jobs kept for pickup on a later rerun
+    JOB_POLL_INTERVAL_SECONDS = 0.5    # Page refresh interval while a job is running
+
+    # Opt-in speculative requests for a draft that stopped changing, so Send usually hits the cache
+    SPECULATIVE_PREFETCH_ENABLED = False
+    SPECULATIVE_DEBOUNCE_SECONDS = 1.5       # Text must be unchanged this long before a request starts
+    SPECULATIVE_MAX_PER_USER_PER_HOUR = 20   # Started speculative requests per user
+    SPECULATIVE_WORKERS = 2
+
+    # Per-contact conversation summaries added to prompts (fixed size, updated as messages are saved)
+    CONVERSATION_CONTEXT_ENABLED = True
+    CONTEXT_RECENT_MESSAGES = 4        # Latest messages quoted as snippets
+    CONTEXT_SNIPPET_CHARS = 160
+    CONTEXT_MAX_TOKENS = 250
+    CONTEXT_MAX_CONTACTS = 2000        # Summaries kept in memory per process
+
+    # Per-model metrics in Prometheus text format at http://HOST:PORT/metrics (local only by default)
+    METRICS_SERVER_ENABLED = True
+    METRICS_SERVER_HOST = "127.0.0.1"
+    METRICS_SERVER_PORT = 9464
+
+    # Default number of messages processed at once by AIEngine.process_many
+    BATCH_MAX_CONCURRENCY = 8
+    BATCH_DEADLINE_SECONDS = 180.0              # Per-item budget, including time queued for a rate-limit slot
+    BATCH_RATE_LIMIT_MAX_WAIT_SECONDS = 120.0   # Batch items queue for a slot instead of skipping the model
+
+    # Token budgets: compressed input size and learned per-mode output limits (capped by MAX_TOKENS)
+    MAX_INPUT_TOKENS = 1500                # Longer pasted messages keep their start and end
+    OUTPUT_BUDGET_DEFAULTS = {"transform": 350, "interpret": 500}  # Until enough samples exist
+    OUTPUT_BUDGET_MIN_TOKENS = 150
+    OUTPUT_BUDGET_PERCENTILE = 95
+    OUTPUT_BUDGET_HEADROOM = 1.25
+    OUTPUT_BUDGET_WINDOW = 200             # Recent completions kept per mode
+    OUTPUT_BUDGET_MIN_SAMPLES = 20
+
+    # Words replaced in the retry prompt after a model refuses a message (case-insensitive)
+    SANITIZE_LEXICON = {
+        "bitch": "[expletive]",
+        "vagina": "[inappropriate reference]",
+        "deport": "remove from country"
+    }
+
+    # End-to-end request deadline and per-attempt timeouts
+    REQUEST_DEADLINE_SECONDS = 45.0       # Default budget for one message across all models
+    DEADLINE_MIN_ATTEMPT_SECONDS = 3.0    # Go to the fallback when less than this is left
+    CONNECT_TIMEOUT_SECONDS = 3.05
+    READ_TIMEOUT_PERCENTILE = 95          # Latency percentile the read timeout is based on
+    READ_TIMEOUT_MULTIPLIER = 2.0
+    READ_TIMEOUT_MIN_SECONDS = 8.0
+    READ_TIMEOUT_MAX_SECONDS = 30.0       # Also used until a model has latency samples
+
     @classmethod
     def get_supabase_url(cls):
         """Get Supabase URL from secrets"""
@@ -31,8 +156,25 @@ class AppConfig:
     
     @classmethod
     def get_openrouter_api_key(cls):
-        """Get OpenRouter API key from secrets"""
-        return st.secrets["openrouter"]["api_key"]
+        """Get OpenRouter API key from secrets, or the OPENROUTER_API_KEY environment variable"""
+        try:
+            return st.secrets["openrouter"]["api_key"]
+        except Exception:
+            api_key = os.environ.get("OPENROUTER_API_KEY")
+            if not api_key:
+                raise
+            return api_key
+    
+    @classmethod
+    def get_openrouter_base_url(cls):
+        """Get the OpenRouter API base URL; OPENROUTER_BASE_URL or openrouter.base_url override it"""
+        base_url = os.environ.get("OPENROUTER_BASE_URL")
+        if not base_url:
+            try:
+                base_url = st.secrets["openrouter"].get("base_url")
+            except Exception:
+                base_url = None
+        return (base_url or cls.OPENROUTER_BASE_URL).rstrip("/")
 
 
 def init_app_config():
@@ -2,6 +2,6 @@
 Core AI processing module for The Third Voice AI
 """
 
-from .ai_engine import AIEngine, MessageType, RelationshipContext
+from .ai_engine import AIEngine, MessageType, RelationshipContext, get_ai_engine
 
-__all__ = ['AIEngine', 'MessageType', 'RelationshipContext']
+__all__ = ['AIEngine', 'MessageType', 'RelationshipContext', 'get_ai_engine']
@@ -4,14 +4,40 @@ The Third Voice - Works around AI model limitations
 Built to handle real human communication
 """
 
+import asyncio
 import hashlib
 import json
+import re
+import socket
+import sqlite3
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from enum import Enum
-from ..data.models import AIResponse
+from typing import Iterator, List, Optional, Tuple
+from ..data.models import AIResponse, BatchResult
+from ..data.disk_cache import DiskCache
 from ..config.settings import AppConfig
+from .response_cache import ResponseCache
+from .similarity_cache import SimilarityCache
+from .model_health import ModelScoreboard, get_health_prober
+from .streaming import AIResponseStream, TransformedMessageExtractor
+from .rate_limiter import get_rate_limiter
+from .response_parser import extract_json_object, validate_ai_payload
+from .token_budget import OutputBudget, compress_message, estimate_tokens
+from .failure_classifier import FailureKind, classify_completion, classify_http_failure
+from .deadline import CancellationToken, Deadline
+from .local_draft import build_local_draft
+from .single_flight import SingleFlight
+from .metrics import get_metrics
+from .conversation_context import ConversationContext
+from .job_pool import Job, JobPool
+from .cache_warmer import get_cache_warmer
+from .prefetcher import SpeculativePrefetcher
 import threading
 import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 
 class MessageType(Enum):
@@ -43,31 +69,254 @@ class RelationshipContext(Enum):
 
 
 class AIEngine:
-    """AI engine that works around content filtering"""
+    """AI engine that works around content filtering
+    
+    Use get_ai_engine() to obtain the shared per-process instance instead of
+    constructing one per Streamlit rerun.
+    """
+    
+    # Bump whenever the prompts change so cached responses are not reused
+    PROMPT_VERSION = "v1"
     
     def __init__(self):
-        # Try models in order of preference - some are less restrictive
+        # Models in order of preference - some are less restrictive.
+        # The scoreboard reorders them at runtime based on observed health.
+        # "json_mode" marks models that accept response_format structured output.
         self.models = [
-            {"id": "deepseek/deepseek-chat-v3-0324:free", "name": "DeepSeek Chat v3", "note": "Usually less restrictive"},
+            {"id": "deepseek/deepseek-chat-v3-0324:free", "name": "DeepSeek Chat v3", "note": "Usually less restrictive", "json_mode": True},
             {"id": "deepseek/deepseek-r1-distill-llama-70b:free", "name": "DeepSeek R1 Distill", "note": "Alternative option"},
             {"id": "meta-llama/llama-3.2-3b-instruct:free", "name": "Llama 3.2 3B", "note": "Meta's instruction model"},
-            {"id": "qwen/qwen-2.5-7b-instruct:free", "name": "Qwen 2.5 7B", "note": "Alibaba's instruction model"},
+            {"id": "qwen/qwen-2.5-7b-instruct:free", "name": "Qwen 2.5 7B", "note": "Alibaba's instruction model", "json_mode": True},
             {"id": "google/gemma-2-9b-it:free", "name": "Gemma 2 9B", "note": "Google's instruction model"}
         ]
 
-        # Start background prewarm
-        threading.Thread(target=self._prewarm_models, daemon=True).start()
+        # Words that trip provider content filters, replaced in one pass on retry
+        self._sanitize_lexicon = {word.lower(): replacement for word, replacement in AppConfig.SANITIZE_LEXICON.items()}
+        self._sanitize_pattern = re.compile(
+            "|".join(re.escape(word) for word in sorted(self._sanitize_lexicon, key=len, reverse=True)),
+            re.IGNORECASE
+        ) if self._sanitize_lexicon else None
 
-    def _prewarm_models(self):
-        """Prewarm all models to reduce first-call latency"""
-        print("⚡ Prewarming AI models in background...")
-        for model_info in self.models:
-            try:
-                self._try_model(model_info, "You are a helper AI.", "Hello. Prewarming model for faster response.")
-                time.sleep(0.2)  # small pause to avoid rate limits
-            except Exception as e:
-                print(f"⚠️ Prewarm failed for {model_info['name']}: {e}")
-        print("✅ Prewarming complete.")
+        # Resolve secrets once and keep a pooled keep-alive session for all calls
+        self.api_key = self._resolve_api_key()
+        self.base_url = AppConfig.get_openrouter_base_url()
+        self.session = self._build_session()
+
+        # Shared throttling across engines, models and API keys
+        self.rate_limiter = get_rate_limiter()
+        self._api_key_id = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:12] if self.api_key else "none"
+
+        # Tiered response cache: in-process LRU, the local disk cache, then the database cache table
+        self.response_cache = ResponseCache(
+            AppConfig.RESPONSE_CACHE_MAX_ENTRIES,
+            AppConfig.RESPONSE_CACHE_TTL_SECONDS
+        )
+        self.disk_cache = self._build_disk_cache()
+        self._db_cache_hits = 0
+        self._cache_misses = 0
+
+        # Near-duplicate lookups for resubmitted messages with small edits
+        self.similarity_cache = SimilarityCache(
+            max_entries=AppConfig.SIMILARITY_CACHE_MAX_ENTRIES,
+            ttl_seconds=AppConfig.RESPONSE_CACHE_TTL_SECONDS,
+            threshold=AppConfig.SIMILARITY_THRESHOLD,
+            min_tokens=AppConfig.SIMILARITY_MIN_TOKENS
+        ) if AppConfig.SIMILARITY_CACHE_ENABLED else None
+
+        # Per-model health drives ordering and circuit breaking
+        self.scoreboard = ModelScoreboard(
+            window=AppConfig.MODEL_HEALTH_WINDOW,
+            ewma_alpha=AppConfig.MODEL_LATENCY_EWMA_ALPHA,
+            failure_threshold=AppConfig.CIRCUIT_FAILURE_THRESHOLD,
+            cooldown_seconds=AppConfig.CIRCUIT_COOLDOWN_SECONDS,
+            default_latency=AppConfig.MODEL_DEFAULT_LATENCY_SECONDS
+        )
+
+        # Shared worker threads for hedged model attempts
+        self._executor = ThreadPoolExecutor(
+            max_workers=AppConfig.HEDGE_MAX_WORKERS,
+            thread_name_prefix="ai-hedge"
+        )
+
+        # Fixed-size per-contact history summaries for prompts
+        self.conversation_context = ConversationContext(
+            AppConfig.CONTEXT_MAX_CONTACTS, AppConfig.CONTEXT_RECENT_MESSAGES,
+            AppConfig.CONTEXT_SNIPPET_CHARS, AppConfig.CONTEXT_MAX_TOKENS
+        )
+
+        # Background workers for page requests, separate from the hedge pool they wait on
+        self.job_pool = JobPool(AppConfig.JOB_WORKERS, AppConfig.JOB_MAX_PENDING, AppConfig.JOB_RESULT_TTL_SECONDS)
+
+        # Opt-in speculative requests for drafts, held back while page requests keep the workers busy
+        self.prefetcher = SpeculativePrefetcher(
+            AppConfig.SPECULATIVE_DEBOUNCE_SECONDS, AppConfig.SPECULATIVE_MAX_PER_USER_PER_HOUR,
+            AppConfig.SPECULATIVE_WORKERS,
+            busy=lambda: self.job_pool.unfinished() >= AppConfig.JOB_WORKERS
+        )
+
+        # Process-wide telemetry, also served as Prometheus text when enabled
+        self.metrics = get_metrics()
+
+        # Identical concurrent requests share one upstream call
+        self._single_flight = SingleFlight()
+
+        # Output token budgets per message type, learned from completion lengths
+        self.output_budget = OutputBudget(
+            defaults=AppConfig.OUTPUT_BUDGET_DEFAULTS,
+            floor=AppConfig.OUTPUT_BUDGET_MIN_TOKENS,
+            ceiling=AppConfig.MAX_TOKENS,
+            percentile=AppConfig.OUTPUT_BUDGET_PERCENTILE,
+            headroom=AppConfig.OUTPUT_BUDGET_HEADROOM,
+            window=AppConfig.OUTPUT_BUDGET_WINDOW,
+            min_samples=AppConfig.OUTPUT_BUDGET_MIN_SAMPLES
+        )
+
+        # Non-blocking clients for the async API, one per event loop, closed when their loop shuts down
+        self._async_clients = weakref.WeakKeyDictionary()  # {loop: (client, lifetime async generator)}
+        self._async_clients_lock = threading.Lock()
+
+        # One shared background prober per process keeps model health fresh
+        if AppConfig.HEALTH_PROBE_ENABLED and self.api_key:
+            get_health_prober().start(self.models, self.scoreboard, self._probe_model)
+
+        # Example messages most first-time visitors send are answered from cache
+        if AppConfig.CACHE_WARMUP_ENABLED and self.api_key:
+            items = [(message, context.value, message_type)
+                     for message, message_type in AppConfig.CACHE_WARMUP_EXAMPLES
+                     for context in RelationshipContext]
+            get_cache_warmer().start(items, self.warm_cache)
+
+    def _resolve_api_key(self) -> Optional[str]:
+        """Read the OpenRouter API key from secrets once"""
+        try:
+            return AppConfig.get_openrouter_api_key()
+        except Exception as e:
+            print(f"❌ ERROR: Could not read OpenRouter API key: {e}")
+            return None
+
+    def _build_disk_cache(self) -> Optional[DiskCache]:
+        if not AppConfig.DISK_CACHE_ENABLED:
+            return None
+        try:
+            return DiskCache(AppConfig.DISK_CACHE_PATH, AppConfig.DISK_CACHE_MAX_ENTRIES,
+                             AppConfig.DISK_CACHE_TTL_SECONDS)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Disk cache unavailable: {str(e)}")
+            return None
+
+    def _build_session(self) -> requests.Session:
+        """Create a keep-alive HTTP session with a bounded connection pool"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=AppConfig.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=AppConfig.HTTP_POOL_MAXSIZE
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        if self.api_key:
+            session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        return session
+
+    def _probe_model(self, model_info: dict) -> bool:
+        """Send one minimal completion to check a model is up; the result feeds the scoreboard"""
+        result, _, latency = self._try_model(model_info, "Reply with OK.", "ping", max_tokens=1, structured=False)
+        if result is None:
+            return False
+        # Any completion shows the model is up; probes ask for no particular format
+        self.scoreboard.record_success(model_info["id"], latency)
+        return True
+
+    def _cache_key(self, message: str, contact_context: str, message_type: str, history: str = "") -> str:
+        """Content hash identifying a response for the caches and single-flight
+
+        history is the conversation summary added to the prompt; answers
+        written with one are only reused when the summary is identical.
+        """
+        parts = [self.PROMPT_VERSION, message_type, contact_context, message.strip()]
+        if history:
+            parts.append(history)
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _get_cached_response(self, cache_key: str, message: str, contact_context: str, message_type: str,
+                             contact_id: str, user_id: str, db) -> Optional[AIResponse]:
+        """Look up a response in the in-process cache, the disk and database caches, then by similarity"""
+        cached = self.response_cache.get(cache_key)
+        if cached:
+            self.metrics.cache_lookups.inc("memory_hit")
+            return cached
+        if self.disk_cache is not None:
+            cached = self.disk_cache.check_cache(contact_id, cache_key, user_id)
+            if cached:
+                self.metrics.cache_lookups.inc("disk_hit")
+                self.response_cache.set(cache_key, cached)
+                return cached
+        if db is not None:
+            cached = db.check_cache(contact_id, cache_key, user_id)
+            if cached:
+                # Not promoted to the shared tiers: the row belongs to one user and keeps only part of the response
+                self._db_cache_hits += 1
+                self.metrics.cache_lookups.inc("db_hit")
+                return cached
+        if self._similarity_applies(message_type):
+            cached = self.similarity_cache.get(self._similarity_scope(contact_context, message_type, user_id),
+                                               message)
+            if cached:
+                # Not promoted to the shared exact-match tiers: the answer was written for another message
+                print("🔁 Near-duplicate cache hit")
+                self.metrics.cache_lookups.inc("similar_hit")
+                return cached
+        self._cache_misses += 1
+        self.metrics.cache_lookups.inc("miss")
+        return None
+
+    def _store_cached_response(self, cache_key: str, message: str, contact_context: str, message_type: str,
+                               contact_id: str, user_id: str, db, ai_response: AIResponse):
+        """Write a fresh model response to every cache tier"""
+        self.response_cache.set(cache_key, ai_response)
+        if self._similarity_applies(message_type):
+            self.similarity_cache.set(self._similarity_scope(contact_context, message_type, user_id),
+                                      message, ai_response)
+        if self.disk_cache is not None:
+            self.disk_cache.save_to_cache(contact_id, cache_key, contact_context,
+                                          ai_response.transformed_message, user_id, ai_response)
+        if db is not None:
+            db.save_to_cache(contact_id, cache_key, contact_context,
+                             ai_response.transformed_message, user_id, ai_response)
+
+    def _similarity_applies(self, message_type: str) -> bool:
+        """Transform answers rewrite the exact text, so only interpretations are matched by similarity"""
+        return self.similarity_cache is not None and message_type != MessageType.TRANSFORM.value
+
+    def _similarity_scope(self, contact_context: str, message_type: str, user_id: str) -> str:
+        """Near-duplicate matches only count within one user's messages with the same prompt, context and mode"""
+        return f"{self.PROMPT_VERSION}:{user_id}:{contact_context}:{message_type}"
+
+    def cache_stats(self) -> dict:
+        """Get hit/miss counters for both cache tiers"""
+        memory_hits = self.response_cache.hits
+        lookups = memory_hits + self.response_cache.misses
+        total_hits = memory_hits + self._db_cache_hits
+        if self.disk_cache is not None:
+            total_hits += self.disk_cache.hits
+        if self.similarity_cache is not None:
+            total_hits += self.similarity_cache.hits
+        return {
+            "memory_hits": memory_hits,
+            "disk_hits": self.disk_cache.hits if self.disk_cache is not None else 0,
+            "db_hits": self._db_cache_hits,
+            "misses": self._cache_misses,
+            "lookups": lookups,
+            "hit_rate": total_hits / lookups if lookups else 0.0,
+            "similar_hits": self.similarity_cache.hits if self.similarity_cache is not None else 0,
+            "memory_entries": len(self.response_cache),
+            "coalesced": self._single_flight.coalesced
+        }
+
+    def _available_models(self) -> list:
+        """Models in scoreboard order, minus open circuits and models the server told us to hold off"""
+        return [model_info for model_info in self.scoreboard.ordered(self.models)
+                if not self.rate_limiter.blocked_for(model_info["id"])]
 
     def _get_model_display_name(self, model_id: str) -> str:
         """Get user-friendly model name"""
@@ -78,155 +327,992 @@ class AIEngine:
     
     def _sanitize_message(self, message: str) -> str:
         """Lightly sanitize message to avoid content filtering while preserving meaning"""
-        sanitized = message.replace("bitch", "[expletive]")
-        sanitized = sanitized.replace("vagina", "[inappropriate reference]")
-        sanitized = sanitized.replace("deport", "remove from country")
-        return sanitized
+        if self._sanitize_pattern is None:
+            return message
+        return self._sanitize_pattern.sub(lambda match: self._sanitize_lexicon[match.group(0).lower()], message)
     
-    def _try_model(self, model_info: dict, system_prompt: str, user_prompt: str) -> dict:
-        """Try a specific model and return the result"""
+    def _completion_payload(self, model_info: dict, system_prompt: str, user_prompt: str,
+                            max_tokens: Optional[int] = None, structured: bool = True) -> dict:
+        """Build the chat completion request body"""
+        payload = {
+            "model": model_info["id"],
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": max_tokens or AppConfig.MAX_TOKENS,
+            "temperature": AppConfig.TEMPERATURE
+        }
+        # Ask for guaranteed JSON where the model supports it
+        if structured and AppConfig.STRUCTURED_OUTPUT_ENABLED and model_info.get("json_mode"):
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def _attempt_timeout(self, model_id: str, deadline: Optional[Deadline]) -> Optional[Tuple[float, float]]:
+        """(connect, read) timeouts for one call, or None when the deadline leaves no room for it
+
+        The read timeout follows the model's observed latency percentile instead
+        of a flat limit, so a stalled call gives way to the next model sooner.
+        """
+        read = self.scoreboard.latency_percentile(model_id, AppConfig.READ_TIMEOUT_PERCENTILE)
+        if read is None:
+            read = AppConfig.READ_TIMEOUT_MAX_SECONDS
+        else:
+            read = min(AppConfig.READ_TIMEOUT_MAX_SECONDS,
+                       max(AppConfig.READ_TIMEOUT_MIN_SECONDS, read * AppConfig.READ_TIMEOUT_MULTIPLIER))
+        connect = AppConfig.CONNECT_TIMEOUT_SECONDS
+        if deadline is None:
+            return connect, read
+        if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+            return None
+        return deadline.cap(connect), deadline.cap(read)
+
+    def _record_call(self, model_id: str, status: str, started: float):
+        """Count one model API call and its latency"""
+        self.metrics.model_requests.inc(model_id, status)
+        self.metrics.model_latency.observe(time.monotonic() - started, model_id)
+
+    def _record_response(self, source: str, deadline: Deadline):
+        """Count where a request's answer came from and how long it took"""
+        self.metrics.responses.inc(source)
+        self.metrics.request_latency.observe(deadline.elapsed(), source)
+
+    @staticmethod
+    def _rate_limit_wait(deadline: Optional[Deadline]) -> float:
+        """Longest one call may queue for a rate-limit slot before the model is skipped"""
+        if deadline is None:
+            return AppConfig.RATE_LIMIT_MAX_WAIT_SECONDS
+        max_wait = deadline.rate_limit_wait
+        return deadline.cap(AppConfig.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait)
+
+    @staticmethod
+    def _status_class(status_code: int) -> str:
+        return "429" if status_code == 429 else f"{status_code // 100}xx"
+
+    def _try_model(self, model_info: dict, system_prompt: str, user_prompt: str,
+                   max_tokens: Optional[int] = None, structured: bool = True,
+                   deadline: Optional[Deadline] = None) -> Tuple[Optional[dict], Optional[FailureKind], float]:
+        """Try a specific model and return (result, None, latency) or (None, failure kind, 0.0)
+
+        HTTP and network failures are recorded on the scoreboard here. A 200
+        with choices is not: the caller records success or failure once the
+        output has been parsed.
+        """
         model_id = model_info["id"]
         print(f"🤖 Trying model: {model_info['name']} ({model_id})")
-        api_key = AppConfig.get_openrouter_api_key()
-        if not api_key:
+        if not self.api_key:
             print("❌ ERROR: No OpenRouter API key found!")
-            return None
+            return None, FailureKind.UNAVAILABLE, 0.0
+        if deadline is not None and deadline.cancelled:
+            return None, FailureKind.CANCELLED, 0.0
+        timeout = self._attempt_timeout(model_id, deadline)
+        if timeout is None:
+            print(f"⏰ Deadline reached, not trying {model_info['name']}")
+            return None, FailureKind.DEADLINE, 0.0
+        max_wait = self._rate_limit_wait(deadline)
+        if not self.rate_limiter.acquire(model_id, self._api_key_id, max_wait):
+            print(f"🚦 {model_info['name']} is rate limited, skipping")
+            return None, FailureKind.UNAVAILABLE, 0.0
+        started = time.monotonic()
         try:
-            response = requests.post(
-                f"{AppConfig.OPENROUTER_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model_id,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "max_tokens": 1000,
-                    "temperature": 0.7
-                },
-                timeout=30
-            )
+            # Streamed so a cancel can abort the body read while the model is still generating
+            with self.session.post(
+                f"{self.base_url}/chat/completions",
+                json=self._completion_payload(model_info, system_prompt, user_prompt, max_tokens, structured),
+                stream=True,
+                timeout=timeout
+            ) as response:
+                unregister = (deadline.on_cancel(lambda: self._abort_response(response))
+                              if deadline is not None else None)
+                try:
+                    response.content  # Read the whole body while a cancel can still abort it
+                finally:
+                    if unregister is not None:
+                        unregister()
+            if deadline is not None and deadline.cancelled:
+                print(f"🛑 Cancelled call to {model_info['name']}")
+                self._record_call(model_id, "cancelled", started)
+                return None, FailureKind.CANCELLED, 0.0
             print(f"📡 Status: {response.status_code}")
+            self._record_call(model_id, self._status_class(response.status_code), started)
+            self.rate_limiter.update_from_headers(model_id, response.status_code, response.headers)
+            if response.status_code == 429:
+                print(f"🚦 Model {model_info['name']} rate limited")
+                return None, FailureKind.RATE_LIMITED, 0.0
             if response.status_code == 200:
                 result = response.json()
                 if "choices" in result and result["choices"]:
-                    return result
+                    # Success is recorded by the caller once the output is known to be usable
+                    return result, None, time.monotonic() - started
             print(f"❌ Model {model_info['name']} failed: Status {response.status_code}")
             print(f"   Error details: {response.text[:300] if response.text else 'No response'}")
-            return None
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Network error with {model_info['name']}: {str(e)}")
-            return None
+            self.scoreboard.record_failure(model_id)
+            if response.status_code == 200:
+                return None, FailureKind.BAD_OUTPUT, 0.0
+            return None, classify_http_failure(response.status_code, response.text), 0.0
         except Exception as e:
+            if deadline is not None and deadline.cancelled:
+                # Aborted by us, not a model failure
+                print(f"🛑 Cancelled call to {model_info['name']}")
+                self._record_call(model_id, "cancelled", started)
+                return None, FailureKind.CANCELLED, 0.0
+            if isinstance(e, requests.exceptions.RequestException):
+                print(f"❌ Network error with {model_info['name']}: {str(e)}")
+                self._record_call(model_id, "network", started)
+                self.scoreboard.record_failure(model_id)
+                return None, FailureKind.NETWORK, 0.0
             print(f"❌ Unexpected error with {model_info['name']}: {str(e)}")
-            return None
+            self._record_call(model_id, "error", started)
+            self.scoreboard.record_failure(model_id)
+            return None, FailureKind.BAD_OUTPUT, 0.0
 
-    def process_message(self, message: str, contact_context: str, message_type: str,
-                        contact_id: str, user_id: str, db) -> AIResponse:
-        """Process message with multiple model fallbacks"""
-        print(f"🎙️ Processing message: {message[:50]}...")
-        used_model_id = None
-        used_model_name = None
+    def _stream_model(self, model_info: dict, system_prompt: str, user_prompt: str,
+                      max_tokens: Optional[int] = None, deadline: Optional[Deadline] = None) -> Iterator:
+        """Stream a completion from a specific model, yielding content deltas
+
+        A failed stream ends with a FailureKind item after any deltas it produced.
+        """
+        model_id = model_info["id"]
+        print(f"🤖 Streaming from model: {model_info['name']} ({model_id})")
+        if not self.api_key:
+            print("❌ ERROR: No OpenRouter API key found!")
+            yield FailureKind.UNAVAILABLE
+            return
+        if deadline is not None and deadline.cancelled:
+            yield FailureKind.CANCELLED
+            return
+        timeout = self._attempt_timeout(model_id, deadline)
+        if timeout is None:
+            print(f"⏰ Deadline reached, not trying {model_info['name']}")
+            yield FailureKind.DEADLINE
+            return
+        max_wait = self._rate_limit_wait(deadline)
+        if not self.rate_limiter.acquire(model_id, self._api_key_id, max_wait):
+            print(f"🚦 {model_info['name']} is rate limited, skipping")
+            yield FailureKind.UNAVAILABLE
+            return
+        payload = self._completion_payload(model_info, system_prompt, user_prompt, max_tokens)
+        payload["stream"] = True
+        started = time.monotonic()
+        received = False
+        finish_reason = None
+        try:
+            with self.session.post(
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                stream=True,
+                timeout=timeout
+            ) as response:
+                # Shutting the socket down aborts the read the loop below is blocked on
+                unregister = (deadline.on_cancel(lambda: self._abort_response(response))
+                              if deadline is not None else None)
+                print(f"📡 Status: {response.status_code}")
+                self.metrics.model_requests.inc(model_id, self._status_class(response.status_code))
+                self.rate_limiter.update_from_headers(model_id, response.status_code, response.headers)
+                if response.status_code == 429:
+                    print(f"🚦 Model {model_info['name']} rate limited")
+                    yield FailureKind.RATE_LIMITED
+                    return
+                if response.status_code != 200:
+                    print(f"❌ Model {model_info['name']} failed: Status {response.status_code}")
+                    self.scoreboard.record_failure(model_id)
+                    yield classify_http_failure(response.status_code, response.text)
+                    return
+                # SSE bodies are UTF-8 but often arrive without a charset
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    # The read timeout only bounds gaps between chunks, so check the deadline too
+                    if deadline is not None and deadline.expired():
+                        if deadline.cancelled:
+                            print(f"🛑 Cancelled streaming from {model_info['name']}")
+                            yield FailureKind.CANCELLED
+                            return
+                        print(f"⏰ Deadline reached while streaming from {model_info['name']}")
+                        yield FailureKind.DEADLINE
+                        return
+                    # Skip blank separators and ": keep-alive" comments
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    if "error" in event:
+                        raise ValueError(f"Stream error: {event['error']}")
+                    choices = event.get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    finish_reason = (choices[0].get("finish_reason") if choices else None) or finish_reason
+                    if delta:
+                        received = True
+                        yield delta
+                if unregister is not None:
+                    unregister()
+            self.metrics.model_latency.observe(time.monotonic() - started, model_id)
+            if not received:
+                self.scoreboard.record_failure(model_id)
+            if finish_reason == "content_filter":
+                yield FailureKind.CONTENT_REFUSAL
+            elif not received:
+                yield FailureKind.BAD_OUTPUT
+        except Exception as e:
+            if deadline is not None and deadline.cancelled:
+                # Aborted by us, not a model failure
+                print(f"🛑 Cancelled streaming from {model_info['name']}")
+                self._record_call(model_id, "cancelled", started)
+                yield FailureKind.CANCELLED
+            elif isinstance(e, requests.exceptions.RequestException):
+                print(f"❌ Network error with {model_info['name']}: {str(e)}")
+                self._record_call(model_id, "network", started)
+                self.scoreboard.record_failure(model_id)
+                yield FailureKind.NETWORK
+            else:
+                print(f"❌ Unexpected error with {model_info['name']}: {str(e)}")
+                self._record_call(model_id, "error", started)
+                self.scoreboard.record_failure(model_id)
+                yield FailureKind.BAD_OUTPUT
+
+    @staticmethod
+    def _abort_response(response: requests.Response):
+        """Wake a thread blocked reading a streamed response and drop its connection
+
+        Closing the response from another thread only takes effect once the
+        next chunk arrives, so the socket itself is shut down first.
+        """
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is None:
+            # With "Connection: close" http.client hands the socket over to the response's reader
+            reader = getattr(getattr(response.raw, "_fp", None), "fp", None)
+            sock = getattr(getattr(reader, "raw", None), "_sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # Already closed
+        response.close()
+
+    def _build_prompts(self, message: str, message_type: str, history: str = ""):
+        """Build the system prompt, the user prompts and the output token budget
 
-        # Prepare prompts
+        The second user prompt, a sanitized retry for content refusals, is only
+        included when sanitizing actually changed the message.
+        """
+        message = compress_message(message, AppConfig.MAX_INPUT_TOKENS)
+        max_tokens = self.output_budget.max_tokens(message_type, estimate_tokens(message))
         if message_type == MessageType.TRANSFORM.value:
             system_prompt = """You are a communication helper. Rewrite messages to be more constructive and healing while keeping the core meaning. Handle all content professionally.
 
 Respond with JSON:
 {"transformed_message": "rewritten message", "healing_score": 7, "sentiment": "positive", "emotional_state": "caring", "explanation": "why this helps"}"""
             
-            user_prompts = [
-                f'Please rewrite this message to be more constructive: "{message}"',
-                f'Please rewrite this message to be more constructive: "{self._sanitize_message(message)}"'
-            ]
+            prompt_template = 'Please rewrite this message to be more constructive: "{}"'
         else:
             system_prompt = """You are a communication helper. Interpret what someone really means beneath their words, even when they're upset or using strong language. Suggest compassionate responses. Handle all content professionally.
 
 Respond with JSON:
 {"transformed_message": "suggested response", "healing_score": 6, "sentiment": "neutral", "emotional_state": "understanding", "explanation": "what they really mean", "subtext": "their deeper feelings", "needs": ["emotional needs"], "warnings": []}"""
             
-            user_prompts = [
-                f'Help me understand what they really mean and how to respond compassionately: "{message}"',
-                f'Help me understand what they really mean and how to respond compassionately: "{self._sanitize_message(message)}"'
-            ]
-
-        # Try each model
-        for model_info in self.models:
-            for user_prompt in user_prompts:
+            prompt_template = 'Help me understand what they really mean and how to respond compassionately: "{}"'
+
+        # Earlier history goes first so the message to handle stays at the end of the prompt
+        if history:
+            prompt_template = history.replace("{", "{{").replace("}", "}}") + "\n\n" + prompt_template
+        user_prompts = [prompt_template.format(message)]
+        sanitized = self._sanitize_message(message)
+        if sanitized != message:
+            user_prompts.append(prompt_template.format(sanitized))
+        return system_prompt, user_prompts, max_tokens
+
+    def _record_output(self, model_id: str, message_type: str, result: dict, ai_text: str):
+        """Feed the completion length back into the output budget and token metrics"""
+        usage = result.get("usage") or {}
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(ai_text)
+        truncated = result["choices"][0].get("finish_reason") == "length"
+        self.output_budget.record(message_type, completion_tokens, truncated)
+        self.metrics.tokens.inc(model_id, "completion", amount=completion_tokens)
+        if usage.get("prompt_tokens"):
+            self.metrics.tokens.inc(model_id, "prompt", amount=usage["prompt_tokens"])
+
+    def _read_completion(self, result: dict, model_info: dict,
+                         message_type: str) -> Tuple[Optional[AIResponse], Optional[FailureKind]]:
+        """Parse a completion into an AIResponse, or classify why it is unusable"""
+        choice = result["choices"][0]
+        ai_text = (choice.get("message") or {}).get("content") or ""
+        print(f"✅ Got response from {model_info['name']}: {ai_text[:50]}...")
+        self._record_output(model_info["id"], message_type, result, ai_text)
+        ai_response = self._parse_ai_response(ai_text, model_info)
+        if ai_response:
+            return ai_response, None
+        return None, classify_completion(choice.get("finish_reason"), ai_text)
+
+    def _parse_ai_response(self, ai_text: str, model_info: dict) -> Optional[AIResponse]:
+        """Turn model JSON output into an AIResponse, or None if it can't be parsed"""
+        ai_data = extract_json_object(ai_text)
+        ai_data = validate_ai_payload(ai_data) if ai_data is not None else None
+        if ai_data is None:
+            print(f"⚠️ Unusable JSON from {model_info['name']}")
+            self.metrics.parse_failures.inc(model_info["id"])
+            return None
+        return AIResponse(
+            model_used=model_info["name"],
+            model_id=model_info["id"],
+            **ai_data
+        )
+
+    def _record_outcome(self, model_id: str, ai_response: Optional[AIResponse], latency: float):
+        """Score a completed call by its output: refusals and unparseable answers count as failures"""
+        if ai_response:
+            self.scoreboard.record_success(model_id, latency)
+        else:
+            self.scoreboard.record_failure(model_id)
+
+    def _attempt_model(self, model_info: dict, system_prompt: str, user_prompts: list,
+                       max_tokens: int, message_type: str, deadline: Deadline) -> Optional[AIResponse]:
+        """Try one model and return its parsed response
+
+        The sanitized prompt is only sent after the model refused the raw one.
+        """
+        failure = None
+        for attempt, user_prompt in enumerate(user_prompts):
+            if attempt and failure is not FailureKind.CONTENT_REFUSAL:
+                break
+            if not self.scoreboard.allow(model_info["id"]):
+                print(f"🔌 Skipping {model_info['name']}: circuit open")
+                return None
+            result = None
+            try:
+                result, failure, latency = self._try_model(model_info, system_prompt, user_prompt, max_tokens,
+                                                           deadline=deadline)
+                if result:
+                    ai_response, failure = self._read_completion(result, model_info, message_type)
+                    self._record_outcome(model_info["id"], ai_response, latency)
+                    if ai_response:
+                        return ai_response
+            except Exception as e:
+                print(f"⚠️ Error with {model_info['name']}: {str(e)}")
+                failure = FailureKind.BAD_OUTPUT
+                if result:
+                    self.scoreboard.record_failure(model_info["id"])
+            if failure is not None:
+                self.metrics.model_failures.inc(model_info["id"], failure.value)
+            if failure is FailureKind.CONTENT_REFUSAL:
+                print(f"🚫 {model_info['name']} refused the message")
+        return None
+
+    def _run_sequential(self, models: list, system_prompt: str, user_prompts: list,
+                        max_tokens: int, message_type: str, deadline: Deadline) -> Optional[AIResponse]:
+        """Walk the model list one model at a time"""
+        for model_info in models:
+            if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+                if not deadline.cancelled:
+                    print("⏰ Deadline reached, using fallback")
+                return None
+            ai_response = self._attempt_model(model_info, system_prompt, user_prompts, max_tokens,
+                                              message_type, deadline)
+            if ai_response:
+                return ai_response
+        return None
+
+    def _run_hedged(self, models: list, system_prompt: str, user_prompts: list,
+                    max_tokens: int, message_type: str, deadline: Deadline) -> Optional[AIResponse]:
+        """Start the next model whenever the current ones are slow or fail; first valid answer wins"""
+        remaining = iter(models)
+        pending = set()
+
+        def launch_next() -> bool:
+            if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+                return False
+            model_info = next(remaining, None)
+            if model_info is None:
+                return False
+            pending.add(self._executor.submit(self._attempt_model, model_info, system_prompt, user_prompts,
+                                              max_tokens, message_type, deadline))
+            return True
+
+        # A cancel completes this future, waking the wait below at once
+        cancel_future = {deadline.token.future} if deadline.token is not None else set()
+        launch_next()
+        while pending:
+            if deadline.expired():
+                if not deadline.cancelled:
+                    print("⏰ Deadline reached, using fallback")
+                return None
+            done, _ = wait(pending | cancel_future, timeout=deadline.cap(AppConfig.HEDGE_DELAY_SECONDS),
+                           return_when=FIRST_COMPLETED)
+            done -= cancel_future
+            if not done:
+                # Primary is slow - hedge with the next model if we have room
+                if len(pending) < AppConfig.HEDGE_MAX_IN_FLIGHT and launch_next():
+                    print(f"⏱️ No answer after {AppConfig.HEDGE_DELAY_SECONDS}s, hedging with next model")
+                continue
+            for future in done:
+                pending.discard(future)
+                ai_response = future.result()
+                if ai_response:
+                    # Losing attempts are abandoned; their threads finish in the background
+                    return ai_response
+                launch_next()
+        return None
+
+    def _conversation_history(self, user_id: str, contact_id: str, db) -> str:
+        """Summary of earlier messages with this contact, or "" when disabled or unavailable"""
+        if not AppConfig.CONVERSATION_CONTEXT_ENABLED:
+            return ""
+        try:
+            return self.conversation_context.context_for(user_id, contact_id, db)
+        except Exception as e:
+            print(f"⚠️ Could not load conversation context: {str(e)}")
+            return ""
+
+    def record_saved_message(self, user_id: str, contact_id: str, message_type: str, original: str,
+                             ai_response: AIResponse):
+        """DatabaseManager message listener keeping contact summaries current"""
+        self.conversation_context.record(user_id, contact_id, message_type, original,
+                                         ai_response.sentiment, ai_response.healing_score)
+
+    def warm_cache(self, message: str, contact_context: str, message_type: str) -> bool:
+        """Make sure a response for this message is in the in-process cache; True if a model was called
+
+        Entries still on disk are promoted without a model call. Lookups here
+        are not counted in the request cache metrics.
+        """
+        cache_key = self._cache_key(message, contact_context, message_type)
+        if self.response_cache.peek(cache_key):
+            return False
+        if self.disk_cache is not None:
+            cached = self.disk_cache.check_cache("warmup", cache_key, "warmup")
+            if cached:
+                self.response_cache.set(cache_key, cached)
+                return False
+        deadline = Deadline(AppConfig.REQUEST_DEADLINE_SECONDS)
+        ai_response = self._generate(message, message_type, deadline)
+        if ai_response:
+            self._store_cached_response(cache_key, message, contact_context, message_type,
+                                        "warmup", "warmup", None, ai_response)
+        return True
+
+    def process_message(self, message: str, contact_context: str, message_type: str,
+                        contact_id: str, user_id: str, db,
+                        deadline_seconds: Optional[float] = None,
+                        cancel_token: Optional[CancellationToken] = None,
+                        deadline: Optional[Deadline] = None) -> AIResponse:
+        """Process message with multiple model fallbacks, falling back once the deadline is near
+
+        Cancelling cancel_token skips the remaining attempts and returns the local draft.
+        A deadline started earlier (e.g. when a job was queued) replaces both.
+        """
+        print(f"🎙️ Processing message: {message[:50]}...")
+        deadline = deadline or Deadline(deadline_seconds or AppConfig.REQUEST_DEADLINE_SECONDS, cancel_token)
+
+        # Serve repeated messages from cache; the history summary is part of the key
+        history = self._conversation_history(user_id, contact_id, db)
+        cache_key = self._cache_key(message, contact_context, message_type, history)
+        cached = self._get_cached_response(cache_key, message, contact_context, message_type,
+                                           contact_id, user_id, db)
+        if cached:
+            print("⚡ Cache hit")
+            self._record_response("cache", deadline)
+            return cached
+
+        # Identical requests already in flight share that call's answer
+        if AppConfig.SINGLE_FLIGHT_ENABLED:
+            ai_response, shared = self._single_flight.do(
+                cache_key, lambda: self._generate(message, message_type, deadline, history),
+                timeout=deadline.remaining(), token=cancel_token
+            )
+            if shared:
+                print("🔗 Shared an identical in-flight request")
+        else:
+            ai_response = self._generate(message, message_type, deadline, history)
+
+        if ai_response:
+            self._store_cached_response(cache_key, message, contact_context, message_type,
+                                        contact_id, user_id, db, ai_response)
+            self._record_response("model", deadline)
+            return ai_response
+
+        return self._unanswered_response(message, message_type, deadline)
+
+    def _generate(self, message: str, message_type: str, deadline: Deadline,
+                  history: str = "") -> Optional[AIResponse]:
+        """Run the model chain for one message; None when no model produced a usable answer"""
+        # Healthiest models first; skip straight to the fallback if every circuit is open
+        models = self._available_models()
+        if not models:
+            print("🔌 No models available (circuits open or rate limited)")
+            return None
+
+        system_prompt, user_prompts, max_tokens = self._build_prompts(message, message_type, history)
+
+        # Try the models, hedging slow ones if enabled
+        if AppConfig.HEDGE_ENABLED:
+            return self._run_hedged(models, system_prompt, user_prompts, max_tokens, message_type, deadline)
+        return self._run_sequential(models, system_prompt, user_prompts, max_tokens, message_type, deadline)
+
+    def stream_message(self, message: str, contact_context: str, message_type: str,
+                       contact_id: str, user_id: str, db,
+                       deadline_seconds: Optional[float] = None,
+                       cancel_token: Optional[CancellationToken] = None,
+                       deadline: Optional[Deadline] = None) -> AIResponseStream:
+        """Stream the transformed message text as it arrives; .response holds the full AIResponse"""
+        return AIResponseStream(
+            self._stream_chain(message, contact_context, message_type, contact_id, user_id, db,
+                               deadline_seconds, cancel_token, deadline)
+        )
+
+    def _stream_chain(self, message: str, contact_context: str, message_type: str,
+                      contact_id: str, user_id: str, db, deadline_seconds: Optional[float] = None,
+                      cancel_token: Optional[CancellationToken] = None,
+                      deadline: Optional[Deadline] = None) -> Iterator:
+        """Yield message text from the first model that streams a valid answer, then the AIResponse"""
+        print(f"🎙️ Streaming message: {message[:50]}...")
+        deadline = deadline or Deadline(deadline_seconds or AppConfig.REQUEST_DEADLINE_SECONDS, cancel_token)
+
+        history = self._conversation_history(user_id, contact_id, db)
+        cache_key = self._cache_key(message, contact_context, message_type, history)
+        cached = self._get_cached_response(cache_key, message, contact_context, message_type,
+                                           contact_id, user_id, db)
+        if cached:
+            print("⚡ Cache hit")
+            self._record_response("cache", deadline)
+            yield cached.transformed_message
+            yield cached
+            return
+
+        # Wait for an identical in-flight request instead of starting another model chain
+        call, leader = self._single_flight.join(cache_key) if AppConfig.SINGLE_FLIGHT_ENABLED else (None, True)
+        while not leader:
+            print("🔗 Waiting on an identical in-flight request")
+            finished, ai_response = call.wait(deadline.remaining(), cancel_token)
+            if not (finished and call.cancelled):
+                break
+            # That request was cancelled; run the model chain ourselves
+            call, leader = self._single_flight.join(cache_key)
+        if leader:
+            ai_response = None
+            try:
+                for item in self._stream_models(message, message_type, deadline, history):
+                    if isinstance(item, AIResponse):
+                        ai_response = item
+                    else:
+                        yield item
+            finally:
+                if call is not None:
+                    self._single_flight.finish(cache_key, call, ai_response, deadline.cancelled)
+
+        if ai_response:
+            self._store_cached_response(cache_key, message, contact_context, message_type,
+                                        contact_id, user_id, db, ai_response)
+            self._record_response("model", deadline)
+            if not leader:
+                yield ai_response.transformed_message
+            yield ai_response
+            return
+
+        fallback = self._unanswered_response(message, message_type, deadline)
+        yield fallback.transformed_message
+        yield fallback
+
+    def _stream_models(self, message: str, message_type: str, deadline: Deadline, history: str = "") -> Iterator:
+        """Yield text from the first model that streams a valid answer, then its AIResponse"""
+        system_prompt, user_prompts, max_tokens = self._build_prompts(message, message_type, history)
+        for model_info in self._available_models():
+            failure = None
+            for attempt, user_prompt in enumerate(user_prompts):
+                # Sanitized retry only after a content refusal
+                if attempt and failure is not FailureKind.CONTENT_REFUSAL:
+                    break
+                if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+                    break
+                if not self.scoreboard.allow(model_info["id"]):
+                    break
+                extractor = TransformedMessageExtractor()
+                chunks = []
+                emitted = False
+                failure = None
+                started = time.monotonic()
+                for delta in self._stream_model(model_info, system_prompt, user_prompt, max_tokens, deadline):
+                    if isinstance(delta, FailureKind):
+                        failure = delta
+                        continue
+                    chunks.append(delta)
+                    text = extractor.feed(delta)
+                    if text:
+                        emitted = True
+                        yield text
+                if chunks:
+                    # Streams carry no usage block, so the budget learns from an estimate
+                    completion_tokens = estimate_tokens("".join(chunks))
+                    self.output_budget.record(message_type, completion_tokens)
+                    self.metrics.tokens.inc(model_info["id"], "completion", amount=completion_tokens)
+                if failure is FailureKind.CANCELLED:
+                    return
                 try:
-                    result = self._try_model(model_info, system_prompt, user_prompt)
-                    if result:
-                        ai_text = result["choices"][0]["message"]["content"]
-                        print(f"✅ Got response from {model_info['name']}: {ai_text[:50]}...")
-                        used_model_id = model_info["id"]
-                        used_model_name = model_info["name"]
-                        try:
-                            ai_data = json.loads(ai_text)
-                        except:
-                            start = ai_text.find('{')
-                            end = ai_text.rfind('}') + 1
-                            if start >= 0 and end > start:
-                                ai_data = json.loads(ai_text[start:end])
-                            else:
-                                continue
-                        return AIResponse(
-                            transformed_message=ai_data.get("transformed_message", "I understand this is difficult."),
-                            healing_score=int(ai_data.get("healing_score", 5)),
-                            sentiment=ai_data.get("sentiment", "neutral"),
-                            emotional_state=ai_data.get("emotional_state", "understanding"),
-                            explanation=ai_data.get("explanation", "Providing support"),
-                            subtext=ai_data.get("subtext", ""),
-                            needs=ai_data.get("needs", []),
-                            warnings=ai_data.get("warnings", []),
-                            model_used=used_model_name,
-                            model_id=used_model_id
-                        )
+                    ai_response = self._parse_ai_response("".join(chunks), model_info) if chunks else None
                 except Exception as e:
                     print(f"⚠️ Error with {model_info['name']}: {str(e)}")
+                    ai_response = None
+                if chunks and failure in (None, FailureKind.CONTENT_REFUSAL):
+                    # The stream completed; its output decides the score (transport failures are already recorded)
+                    self._record_outcome(model_info["id"], ai_response, time.monotonic() - started)
+                if ai_response:
+                    yield ai_response
+                    return
+                if failure is None:
+                    failure = classify_completion(None, "".join(chunks))
+                self.metrics.model_failures.inc(model_info["id"], failure.value)
+                if emitted:
+                    # Partial text already shown; separate it from the next attempt
+                    yield "\n\n"
+
+    async def _get_async_client(self) -> httpx.AsyncClient:
+        """Get the pooled async HTTP client for the running event loop
+
+        Each loop gets its own client, so loops in different threads never
+        replace each other's. The client is closed by an async generator
+        registered with the loop: loop.shutdown_asyncgens(), which
+        asyncio.run() calls on exit, finalizes it.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            entry = self._async_clients.get(loop)
+            if entry is not None:
+                return entry[0]
+            client = httpx.AsyncClient(
+                headers=dict(self.session.headers),
+                limits=httpx.Limits(
+                    max_connections=AppConfig.ASYNC_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=AppConfig.HTTP_POOL_MAXSIZE
+                ),
+                timeout=httpx.Timeout(AppConfig.READ_TIMEOUT_MAX_SECONDS, connect=AppConfig.CONNECT_TIMEOUT_SECONDS)
+            )
+            lifetime = self._async_client_lifetime(client)
+            self._async_clients[loop] = (client, lifetime)
+        await lifetime.__anext__()
+        return client
+
+    @staticmethod
+    async def _async_client_lifetime(client: httpx.AsyncClient):
+        """Suspended until its loop shuts down, then closes the client"""
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    async def _atry_model(self, model_info: dict, system_prompt: str, user_prompt: str,
+                          max_tokens: Optional[int] = None,
+                          deadline: Optional[Deadline] = None) -> Tuple[Optional[dict], Optional[FailureKind], float]:
+        """Async counterpart of _try_model"""
+        model_id = model_info["id"]
+        print(f"🤖 Trying model (async): {model_info['name']} ({model_id})")
+        if not self.api_key:
+            print("❌ ERROR: No OpenRouter API key found!")
+            return None, FailureKind.UNAVAILABLE, 0.0
+        if deadline is not None and deadline.cancelled:
+            return None, FailureKind.CANCELLED, 0.0
+        timeout = self._attempt_timeout(model_id, deadline)
+        if timeout is None:
+            print(f"⏰ Deadline reached, not trying {model_info['name']}")
+            return None, FailureKind.DEADLINE, 0.0
+        max_wait = self._rate_limit_wait(deadline)
+        if not await self.rate_limiter.aacquire(model_id, self._api_key_id, max_wait):
+            print(f"🚦 {model_info['name']} is rate limited, skipping")
+            return None, FailureKind.UNAVAILABLE, 0.0
+        started = time.monotonic()
+        try:
+            client = await self._get_async_client()
+            response = await client.post(
+                f"{self.base_url}/chat/completions",
+                json=self._completion_payload(model_info, system_prompt, user_prompt, max_tokens),
+                timeout=httpx.Timeout(timeout[1], connect=timeout[0])
+            )
+            print(f"📡 Status: {response.status_code}")
+            self._record_call(model_id, self._status_class(response.status_code), started)
+            self.rate_limiter.update_from_headers(model_id, response.status_code, response.headers)
+            if response.status_code == 429:
+                print(f"🚦 Model {model_info['name']} rate limited")
+                return None, FailureKind.RATE_LIMITED, 0.0
+            if response.status_code == 200:
+                result = response.json()
+                if "choices" in result and result["choices"]:
+                    # Success is recorded by the caller once the output is known to be usable
+                    return result, None, time.monotonic() - started
+            print(f"❌ Model {model_info['name']} failed: Status {response.status_code}")
+            print(f"   Error details: {response.text[:300] if response.text else 'No response'}")
+            self.scoreboard.record_failure(model_id)
+            if response.status_code == 200:
+                return None, FailureKind.BAD_OUTPUT, 0.0
+            return None, classify_http_failure(response.status_code, response.text), 0.0
+        except httpx.HTTPError as e:
+            print(f"❌ Network error with {model_info['name']}: {str(e)}")
+            self._record_call(model_id, "network", started)
+            self.scoreboard.record_failure(model_id)
+            return None, FailureKind.NETWORK, 0.0
+        except Exception as e:
+            print(f"❌ Unexpected error with {model_info['name']}: {str(e)}")
+            self._record_call(model_id, "error", started)
+            self.scoreboard.record_failure(model_id)
+            return None, FailureKind.BAD_OUTPUT, 0.0
+
+    async def _aattempt_model(self, model_info: dict, system_prompt: str, user_prompts: list,
+                              max_tokens: int, message_type: str, deadline: Deadline) -> Optional[AIResponse]:
+        """Async counterpart of _attempt_model"""
+        failure = None
+        for attempt, user_prompt in enumerate(user_prompts):
+            if attempt and failure is not FailureKind.CONTENT_REFUSAL:
+                break
+            if not self.scoreboard.allow(model_info["id"]):
+                print(f"🔌 Skipping {model_info['name']}: circuit open")
+                return None
+            result = None
+            try:
+                result, failure, latency = await self._atry_model(model_info, system_prompt, user_prompt, max_tokens, deadline)
+                if result:
+                    ai_response, failure = self._read_completion(result, model_info, message_type)
+                    self._record_outcome(model_info["id"], ai_response, latency)
+                    if ai_response:
+                        return ai_response
+            except Exception as e:
+                print(f"⚠️ Error with {model_info['name']}: {str(e)}")
+                failure = FailureKind.BAD_OUTPUT
+                if result:
+                    self.scoreboard.record_failure(model_info["id"])
+            if failure is not None:
+                self.metrics.model_failures.inc(model_info["id"], failure.value)
+            if failure is FailureKind.CONTENT_REFUSAL:
+                print(f"🚫 {model_info['name']} refused the message")
+        return None
+
+    async def _arun_hedged(self, models: list, system_prompt: str, user_prompts: list,
+                           max_tokens: int, message_type: str, deadline: Deadline) -> Optional[AIResponse]:
+        """Async hedging; losing attempts are cancelled rather than abandoned"""
+        remaining = iter(models)
+        pending = set()
+
+        def launch_next() -> bool:
+            if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+                return False
+            model_info = next(remaining, None)
+            if model_info is None:
+                return False
+            pending.add(asyncio.ensure_future(
+                self._aattempt_model(model_info, system_prompt, user_prompts, max_tokens, message_type, deadline)
+            ))
+            return True
+
+        launch_next()
+        try:
+            while pending:
+                if deadline.expired():
+                    if not deadline.cancelled:
+                        print("⏰ Deadline reached, using fallback")
+                    return None
+                done, _ = await asyncio.wait(pending, timeout=deadline.cap(AppConfig.HEDGE_DELAY_SECONDS),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if len(pending) < AppConfig.HEDGE_MAX_IN_FLIGHT and launch_next():
+                        print(f"⏱️ No answer after {AppConfig.HEDGE_DELAY_SECONDS}s, hedging with next model")
                     continue
+                for task in done:
+                    pending.discard(task)
+                    ai_response = task.result()
+                    if ai_response:
+                        return ai_response
+                    launch_next()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
 
-        # Fallback
-        print("💥 All models failed, using intelligent fallback")
-        message_lower = message.lower()
-        if message_type == MessageType.INTERPRET.value:
-            if "deport" in message_lower or "immigration" in message_lower:
-                return AIResponse(
-                    transformed_message="I can hear how scared and angry you are about the immigration situation. You're dealing with so much uncertainty and betrayal. I'm here for you through all of this - you don't have to face it alone.",
-                    healing_score=7, sentiment="neutral", emotional_state="understanding",
-                    explanation="Your friend is expressing deep fear about deportation, anger about betrayal, and the stress of legal troubles. They're using dark humor to cope but really need support and understanding.",
-                    subtext="Feeling scared, betrayed, and overwhelmed by legal/immigration issues",
-                    needs=["safety", "support", "loyalty", "someone who understands", "emotional validation"],
-                    model_used="Fallback System",
-                    model_id="fallback"
-                )
-            elif "family" in message_lower and "torn apart" in message_lower:
-                return AIResponse(
-                    transformed_message="I hear the pain in your words about your family being torn apart. You're right that we've both been through hell in different ways. I see you, I understand your struggle, and I'm grateful you're sharing this with me.",
-                    healing_score=6, sentiment="neutral", emotional_state="understanding",
-                    explanation="They're sharing deep pain about family separation and life's unfairness, looking for connection with someone who understands similar struggles.",
-                    subtext="Feeling isolated and hurt by family separation, seeking understanding from someone who relates",
-                    needs=["empathy", "validation", "connection", "shared understanding"],
-                    model_used="Fallback System",
-                    model_id="fallback"
-                )
-            else:
-                return AIResponse(
-                    transformed_message="I can see you're dealing with so much pain and anger right now. Thank you for trusting me with these heavy feelings. I'm here to listen and support you however I can.",
-                    healing_score=6, sentiment="neutral", emotional_state="understanding",
-                    explanation="They're sharing intense emotions and difficult circumstances, needing someone to witness their pain without judgment.",
-                    subtext="Overwhelmed by multiple life challenges and needing emotional support",
-                    needs=["validation", "emotional support", "someone to listen"],
-                    model_used="Fallback System",
-                    model_id="fallback"
-                )
-        else:
-            return AIResponse(
-                transformed_message="I'm going through a really tough time and feeling overwhelmed by everything happening. I value our friendship and wanted to share what's on my mind. Can we talk?",
-                healing_score=5, sentiment="neutral", emotional_state="caring",
-                explanation="Transformed the raw emotions into a request for connection and support",
-                model_used="Fallback System",
-                model_id="fallback"
+    async def aprocess_message(self, message: str, contact_context: str, message_type: str,
+                               contact_id: str, user_id: str, db,
+                               deadline_seconds: Optional[float] = None,
+                               cancel_token: Optional[CancellationToken] = None,
+                               deadline: Optional[Deadline] = None) -> AIResponse:
+        """Async counterpart of process_message with the same cache, deadline and fallback behaviour"""
+        print(f"🎙️ Processing message (async): {message[:50]}...")
+        deadline = deadline or Deadline(deadline_seconds or AppConfig.REQUEST_DEADLINE_SECONDS, cancel_token)
+
+        # Database calls are blocking, so they run in a worker thread
+        history = await asyncio.to_thread(self._conversation_history, user_id, contact_id, db)
+        cache_key = self._cache_key(message, contact_context, message_type, history)
+        cached = await asyncio.to_thread(self._get_cached_response, cache_key, message,
+                                         contact_context, message_type, contact_id, user_id, db)
+        if cached:
+            print("⚡ Cache hit")
+            self._record_response("cache", deadline)
+            return cached
+
+        if AppConfig.SINGLE_FLIGHT_ENABLED:
+            ai_response, shared = await self._single_flight.ado(
+                cache_key, lambda: self._agenerate_cancellable(message, message_type, deadline, history),
+                timeout=deadline.remaining(), token=cancel_token
             )
+            if shared:
+                print("🔗 Shared an identical in-flight request")
+        else:
+            ai_response = await self._agenerate_cancellable(message, message_type, deadline, history)
+
+        if ai_response:
+            await asyncio.to_thread(self._store_cached_response, cache_key, message, contact_context, message_type,
+                                    contact_id, user_id, db, ai_response)
+            self._record_response("model", deadline)
+            return ai_response
+
+        return self._unanswered_response(message, message_type, deadline)
+
+    async def _agenerate_cancellable(self, message: str, message_type: str, deadline: Deadline,
+                                     history: str = "") -> Optional[AIResponse]:
+        """Run _agenerate as a task that a cancel stops at once, aborting its in-flight HTTP calls"""
+        task = asyncio.ensure_future(self._agenerate(message, message_type, deadline, history))
+        loop = asyncio.get_running_loop()
+        unregister = deadline.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not deadline.cancelled:
+                raise
+            return None
+        finally:
+            unregister()
+
+    async def _agenerate(self, message: str, message_type: str, deadline: Deadline,
+                         history: str = "") -> Optional[AIResponse]:
+        """Async counterpart of _generate"""
+        models = self._available_models()
+        if not models:
+            print("🔌 No models available (circuits open or rate limited)")
+            return None
+
+        system_prompt, user_prompts, max_tokens = self._build_prompts(message, message_type, history)
+
+        if AppConfig.HEDGE_ENABLED:
+            return await self._arun_hedged(models, system_prompt, user_prompts, max_tokens, message_type, deadline)
+        for model_info in models:
+            if deadline.expired(AppConfig.DEADLINE_MIN_ATTEMPT_SECONDS):
+                break
+            ai_response = await self._aattempt_model(model_info, system_prompt, user_prompts,
+                                                     max_tokens, message_type, deadline)
+            if ai_response:
+                return ai_response
+        return None
+
+    def submit_message(self, message: str, contact_context: str, message_type: str,
+                       contact_id: str, user_id: str, db) -> Optional[Job]:
+        """Queue a message on the background workers; None when the pool is full
+
+        The job's result is the AIResponse. With streaming enabled, job.partial
+        shows the message text received so far. job.cancel() abandons it.
+        The request deadline starts now, so time spent queued counts against it.
+        """
+        deadline = Deadline(AppConfig.REQUEST_DEADLINE_SECONDS)
+        return self.job_pool.submit(self._run_message_job, deadline, message, contact_context, message_type,
+                                    contact_id, user_id, db)
+
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self.job_pool.get(job_id)
+
+    def speculate(self, message: str, contact_context: str, message_type: str,
+                  contact_id: str, user_id: str, db):
+        """Answer a draft in the background once it has stopped changing, so sending it hits the cache
+
+        Replaces and cancels the user's previous speculative request. Does
+        nothing unless SPECULATIVE_PREFETCH_ENABLED is set; cached drafts are
+        not requested again.
+        """
+        if not AppConfig.SPECULATIVE_PREFETCH_ENABLED:
+            return
+        if not message.strip():
+            self.prefetcher.withdraw(user_id)
+            return
+        request_key = self._cache_key(message, contact_context, message_type)
+
+        def run(token: CancellationToken):
+            history = self._conversation_history(user_id, contact_id, db)
+            if self.response_cache.peek(self._cache_key(message, contact_context, message_type, history)):
+                return
+            print(f"🔮 Speculative request: {message[:50]}...")
+            self.process_message(message, contact_context, message_type, contact_id, user_id, db,
+                                 cancel_token=token)
+
+        self.prefetcher.propose(user_id, request_key, run)
+
+    def mark_sent(self, message: str, contact_context: str, message_type: str, user_id: str):
+        """Tell the prefetcher the user sent this message, so it is not speculated on again"""
+        self.prefetcher.mark_sent(user_id, self._cache_key(message, contact_context, message_type))
+
+    def _run_message_job(self, job: Job, deadline: Deadline, message: str, contact_context: str,
+                         message_type: str, contact_id: str, user_id: str, db) -> AIResponse:
+        deadline.token = job.cancel_token
+        if not AppConfig.STREAMING_ENABLED:
+            return self.process_message(message, contact_context, message_type, contact_id, user_id, db,
+                                        deadline=deadline)
+        stream = self.stream_message(message, contact_context, message_type, contact_id, user_id, db,
+                                     deadline=deadline)
+        for chunk in stream:
+            job.partial += chunk
+        return stream.response
+
+    def process_many(self, items: List[Tuple[str, str, str]], max_concurrency: Optional[int] = None,
+                     contact_id: str = "batch", user_id: str = "batch", db=None) -> List[BatchResult]:
+        """Process (message, contact_context, message_type) items concurrently, results in input order"""
+        return asyncio.run(self.aprocess_many(items, max_concurrency, contact_id, user_id, db))
+
+    async def aprocess_many(self, items: List[Tuple[str, str, str]], max_concurrency: Optional[int] = None,
+                            contact_id: str = "batch", user_id: str = "batch", db=None) -> List[BatchResult]:
+        """Async counterpart of process_many
+
+        Items wait for a rate-limit slot rather than skipping to the next
+        model, and an item no model answered is reported as an error.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or AppConfig.BATCH_MAX_CONCURRENCY)
+
+        async def run_item(index: int, item: Tuple[str, str, str]) -> BatchResult:
+            message, contact_context, message_type = item
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    deadline = Deadline(AppConfig.BATCH_DEADLINE_SECONDS,
+                                        rate_limit_wait=AppConfig.BATCH_RATE_LIMIT_MAX_WAIT_SECONDS)
+                    ai_response = await self.aprocess_message(
+                        message, contact_context, message_type, contact_id, user_id, db, deadline=deadline
+                    )
+                    error = "No model answered; response is the local fallback" if ai_response.is_fallback_response else ""
+                    return BatchResult(index, ai_response, error=error, elapsed_seconds=time.monotonic() - started)
+                except Exception as e:
+                    return BatchResult(index, None, error=str(e), elapsed_seconds=time.monotonic() - started)
+
+        print(f"📦 Processing batch of {len(items)} messages")
+        return list(await asyncio.gather(*(run_item(i, item) for i, item in enumerate(items))))
+
+    def draft_response(self, message: str, message_type: str) -> AIResponse:
+        """Instant rule-based draft to show while the model answer is on its way"""
+        return build_local_draft(message, message_type)
+
+    def _unanswered_response(self, message: str, message_type: str, deadline: Deadline) -> AIResponse:
+        """Local response for a request no model answered, recorded as cancelled or fallback"""
+        if deadline.cancelled:
+            print("🛑 Request cancelled")
+            self._record_response("cancelled", deadline)
+            return build_local_draft(message, message_type)
+        self._record_response("fallback", deadline)
+        return self._fallback_response(message, message_type)
+
+    def _fallback_response(self, message: str, message_type: str) -> AIResponse:
+        """Build an intelligent fallback response when every model failed"""
+        print("💥 All models failed, using intelligent fallback")
+        return build_local_draft(message, message_type)
+
+
+_engine_instance: Optional[AIEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_ai_engine() -> AIEngine:
+    """Get the process-wide AIEngine, creating it on first use"""
+    global _engine_instance
+    if _engine_instance is None:
+        with _engine_lock:
+            if _engine_instance is None:
+                _engine_instance = AIEngine()
+    return _engine_instance
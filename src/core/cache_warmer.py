@@ -0,0 +1,71 @@
+"""
+Cache Warmer Module
+The Third Voice - Precomputes responses for the example messages first-time visitors send
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ..config.settings import AppConfig
+
+# (message, contact_context, message_type)
+WarmupItem = Tuple[str, str, str]
+
+
+class CacheWarmer:
+    """Single background thread that keeps example responses cached
+
+    Each pass calls warm() for every item; warm() is expected to be cheap
+    when the response is still cached, so passes after the first only
+    spend model calls on entries that expired or were evicted.
+    """
+
+    def __init__(self, interval_seconds: float, pacing_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.pacing_seconds = pacing_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, items: List[WarmupItem], warm: Callable[[str, str, str], bool]):
+        """Start warming in the background; later calls are no-ops while the thread runs"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(items, warm), name="cache-warmer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, items: List[WarmupItem], warm: Callable[[str, str, str], bool]):
+        print(f"🔥 Cache warmer started for {len(items)} examples")
+        while True:
+            generated = 0
+            for message, contact_context, message_type in items:
+                try:
+                    if warm(message, contact_context, message_type):
+                        generated += 1
+                        # Space out model calls so warm-up never crowds out real requests
+                        time.sleep(self.pacing_seconds)
+                except Exception as e:
+                    print(f"⚠️ Warm-up failed for {contact_context}/{message_type}: {e}")
+            if generated:
+                print(f"🔥 Warmed {generated} example responses")
+            time.sleep(self.interval_seconds)
+
+
+_warmer_instance: Optional[CacheWarmer] = None
+_warmer_lock = threading.Lock()
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Get the process-wide cache warmer"""
+    global _warmer_instance
+    if _warmer_instance is None:
+        with _warmer_lock:
+            if _warmer_instance is None:
+                _warmer_instance = CacheWarmer(
+                    AppConfig.CACHE_WARMUP_INTERVAL_SECONDS,
+                    AppConfig.CACHE_WARMUP_PACING_SECONDS
+                )
+    return _warmer_instance
@@ -0,0 +1,129 @@
+"""
+Conversation Context Module
+The Third Voice - Fixed-size per-contact summaries of earlier messages for prompts
+"""
+
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import Optional
+
+from .local_draft import detect_theme
+from .token_budget import estimate_tokens
+
+
+class ContactSummary:
+    """Rolling summary of one contact's history, updated one message at a time
+
+    Older messages are folded into theme, tone and score tallies; only the
+    most recent few are kept as short snippets, so the size stays constant.
+    """
+
+    def __init__(self, recent_messages: int, snippet_chars: int):
+        self.snippet_chars = snippet_chars
+        self.message_count = 0
+        self.themes = Counter()
+        self.sentiments = Counter()
+        self.healing_total = 0
+        self.healing_count = 0
+        self.recent = deque(maxlen=recent_messages)  # [(message_type, snippet)]
+        self._rendered: Optional[str] = None
+
+    def add(self, message_type: str, original: str, sentiment: Optional[str] = None,
+            healing_score: Optional[int] = None):
+        self.message_count += 1
+        theme = detect_theme(original)["name"]
+        if theme != "general":
+            self.themes[theme] += 1
+        if sentiment:
+            self.sentiments[sentiment] += 1
+        if healing_score:
+            self.healing_total += healing_score
+            self.healing_count += 1
+        snippet = " ".join(original.split())
+        if len(snippet) > self.snippet_chars:
+            snippet = snippet[:self.snippet_chars].rsplit(" ", 1)[0] + "..."
+        self.recent.append((message_type, snippet))
+        self._rendered = None
+
+    def render(self, max_tokens: int) -> str:
+        """Prompt text for this contact, cached until the next message is added"""
+        if self._rendered is None:
+            self._rendered = self._render(max_tokens)
+        return self._rendered
+
+    def _render(self, max_tokens: int) -> str:
+        if not self.message_count:
+            return ""
+        facts = [f"{self.message_count} earlier message{'s' if self.message_count != 1 else ''}"]
+        if self.themes:
+            facts.append("mostly about " + ", ".join(name.replace("_", " ") for name, _ in self.themes.most_common(3)))
+        if self.sentiments:
+            facts.append(f"tone mostly {self.sentiments.most_common(1)[0][0]}")
+        if self.healing_count:
+            facts.append(f"average healing score {self.healing_total / self.healing_count:.1f}")
+        lines = ["Conversation so far with this person: " + "; ".join(facts) + "."]
+        if self.recent:
+            lines.append("Most recent messages (oldest first):")
+            for message_type, snippet in self.recent:
+                speaker = "I wrote" if message_type == "transform" else "They said"
+                lines.append(f'- {speaker}: "{snippet}"')
+
+        # Drop the oldest snippets until the summary fits its budget
+        while len(lines) > 2 and estimate_tokens("\n".join(lines)) > max_tokens:
+            del lines[2]
+        return "\n".join(lines)
+
+
+class ConversationContext:
+    """Per-contact summaries shared by every session in the process
+
+    A contact's summary is seeded once from the database history, then kept
+    current by record() as messages are saved. Contacts not used recently
+    are evicted to bound memory.
+    """
+
+    def __init__(self, max_contacts: int, recent_messages: int, snippet_chars: int, max_tokens: int):
+        self.max_contacts = max_contacts
+        self.recent_messages = recent_messages
+        self.snippet_chars = snippet_chars
+        self.max_tokens = max_tokens
+        self._summaries = OrderedDict()  # {(user_id, contact_id): ContactSummary}
+        self._lock = threading.Lock()
+
+    def _new_summary(self) -> ContactSummary:
+        return ContactSummary(self.recent_messages, self.snippet_chars)
+
+    def context_for(self, user_id: str, contact_id: str, db=None) -> str:
+        """Summary text for prompts; empty when there is no earlier history"""
+        key = (user_id, contact_id)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                return summary.render(self.max_tokens)
+        if db is None:
+            return ""
+
+        summary = self._new_summary()
+        # History comes newest first; fold it in oldest first
+        for message in reversed(db.get_conversation_history(contact_id, user_id)):
+            summary.add(message.type, message.original, message.sentiment, message.healing_score)
+        with self._lock:
+            # Another session may have seeded it meanwhile; keep theirs
+            summary = self._summaries.setdefault(key, summary)
+            while len(self._summaries) > self.max_contacts:
+                self._summaries.popitem(last=False)
+            return summary.render(self.max_tokens)
+
+    def record(self, user_id: str, contact_id: str, message_type: str, original: str,
+               sentiment: Optional[str] = None, healing_score: Optional[int] = None):
+        """Fold a newly saved message into the contact's summary
+
+        Contacts without a summary yet are skipped; their first context_for()
+        call seeds from the database, which already includes this message.
+        """
+        with self._lock:
+            summary = self._summaries.get((user_id, contact_id))
+            if summary is not None:
+                summary.add(message_type, original, sentiment, healing_score)
+
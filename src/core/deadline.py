@@ -0,0 +1,96 @@
+"""
+Deadline Module
+The Third Voice - End-to-end time budget shared by every attempt of one request
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+class CancellationToken:
+    """Tripped by the caller to stop a request's remaining work
+
+    Callbacks registered with on_cancel run once, on the cancelling thread.
+    """
+
+    def __init__(self):
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.future = Future()  # Completes on cancel, so waits on other futures can include it
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.done()
+
+    def cancel(self):
+        with self._lock:
+            if self.future.done():
+                return
+            self.future.set_result(None)
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Cancel callback failed: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback on cancel (now, if already cancelled); returns a function that unregisters it"""
+        with self._lock:
+            if not self.future.done():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class Deadline:
+    """Monotonic deadline for one request across models, prompts and hedges
+
+    A cancelled token expires the deadline at once, so every check that
+    stops work at the deadline also stops it on cancel. rate_limit_wait
+    overrides how long each call may queue for a rate-limit slot.
+    """
+
+    def __init__(self, seconds: float, token: Optional[CancellationToken] = None,
+                 rate_limit_wait: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.token = token
+        self.rate_limit_wait = rate_limit_wait
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token is not None and self.token.cancelled
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a cancel callback; a no-op without a token"""
+        if self.token is None:
+            return lambda: None
+        return self.token.on_cancel(callback)
+
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.monotonic() - (self.expires_at - self.seconds)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        """True once less than reserve seconds are left"""
+        return self.remaining() <= reserve
+
+    def cap(self, seconds: Optional[float]) -> float:
+        """Limit a wait so it ends by the deadline"""
+        remaining = self.remaining()
+        return remaining if seconds is None else min(seconds, remaining)
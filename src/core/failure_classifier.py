@@ -0,0 +1,52 @@
+"""
+Failure Classifier Module
+The Third Voice - Tells content refusals apart from other model call failures
+"""
+
+import re
+from enum import Enum
+from typing import Optional
+
+
+class FailureKind(Enum):
+    UNAVAILABLE = "unavailable"        # No API key, circuit open or rate limited locally
+    RATE_LIMITED = "rate_limited"      # 429 from the provider
+    NETWORK = "network"                # Connection errors and timeouts
+    SERVER_ERROR = "server_error"      # 5xx
+    REQUEST_ERROR = "request_error"    # Other 4xx
+    CONTENT_REFUSAL = "content_refusal"
+    BAD_OUTPUT = "bad_output"          # 200 but nothing usable came back
+    DEADLINE = "deadline"              # Not enough of the request deadline left to try
+    CANCELLED = "cancelled"            # The caller cancelled the request
+
+
+# Provider error bodies for moderated requests (OpenRouter returns 403 with "flagged" reasons)
+_MODERATION_ERROR = re.compile(r"moderat|flagged|content[ _-]?(?:policy|filter)|safety|inappropriate", re.IGNORECASE)
+
+# Model replies that decline instead of answering
+_REFUSAL_TEXT = re.compile(
+    r"\bI(?:'m| am)? (?:sorry|unable|not able)\b|\bI (?:can(?:no|')t|won't|will not|must decline)\b"
+    r"|\bas an AI\b|\bagainst (?:my|the) (?:guidelines|policy|policies)\b",
+    re.IGNORECASE
+)
+
+
+def classify_http_failure(status_code: int, body: str) -> FailureKind:
+    """Classify a non-200 completion response"""
+    if status_code == 429:
+        return FailureKind.RATE_LIMITED
+    if status_code in (400, 403, 451) and _MODERATION_ERROR.search(body or ""):
+        return FailureKind.CONTENT_REFUSAL
+    if status_code >= 500:
+        return FailureKind.SERVER_ERROR
+    return FailureKind.REQUEST_ERROR
+
+
+def classify_completion(finish_reason: Optional[str], text: str) -> FailureKind:
+    """Classify a 200 completion whose text could not be used"""
+    if finish_reason == "content_filter":
+        return FailureKind.CONTENT_REFUSAL
+    # Only the opening matters; refusals lead with the apology
+    if text and "{" not in text[:200] and _REFUSAL_TEXT.search(text[:200]):
+        return FailureKind.CONTENT_REFUSAL
+    return FailureKind.BAD_OUTPUT
@@ -0,0 +1,107 @@
+"""
+Job Pool Module
+The Third Voice - Bounded background workers for model calls, polled by job id
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from .deadline import CancellationToken
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job:
+    """Handle for one background job; partial holds text streamed so far"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = JobStatus.QUEUED
+        self.result: Any = None
+        self.error = ""
+        self.partial = ""
+        self.submitted_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.cancel_token = CancellationToken()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def cancel(self):
+        """Stop the job's work; a queued job never starts"""
+        self.cancel_token.cancel()
+
+
+class JobPool:
+    """Fixed worker threads with a cap on unfinished jobs
+
+    Finished jobs stay retrievable by id for result_ttl seconds, so a page
+    can pick up the result on a later rerun.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, result_ttl: float):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-job")
+        self._jobs = {}  # {job_id: Job}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Optional[Job]:
+        """Queue fn(job, *args); None when max_pending jobs are already unfinished"""
+        with self._lock:
+            self._prune()
+            if sum(1 for job in self._jobs.values() if not job.done) >= self.max_pending:
+                print("🚧 Job pool full, not queueing")
+                return None
+            job = Job()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple):
+        if job.cancel_token.cancelled:
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.monotonic()
+            return
+        job.status = JobStatus.RUNNING
+        try:
+            job.result = fn(job, *args)
+            job.status = JobStatus.CANCELLED if job.cancel_token.cancelled else JobStatus.DONE
+        except Exception as e:
+            print(f"❌ Background job failed: {str(e)}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.monotonic()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def unfinished(self) -> int:
+        """Jobs queued or running"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status.value: statuses.count(status) for status in JobStatus}
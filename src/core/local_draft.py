@@ -0,0 +1,197 @@
+"""
+Local Draft Module
+The Third Voice - Instant rule-based responses shown before (or instead of) a model answer
+"""
+
+import re
+
+from ..data.models import AIResponse
+
+FALLBACK_MODEL_NAME = "Fallback System"
+FALLBACK_MODEL_ID = "fallback"
+
+
+def _words(*words: str) -> re.Pattern:
+    """Whole-word alternatives; a trailing * marks a stem that may run on (apprecia* matches appreciated)"""
+    alternatives = [word[:-1] + r"\w*" if word.endswith("*") else word for word in words]
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+# Recognized themes, most specific first. "requires" must also match when present.
+_THEMES = [
+    {
+        "name": "immigration",
+        "pattern": _words("deport*", "immigration", "visas?", "green cards?", "asylum", "borders?"),
+        "feeling": "scared about what's happening with my immigration situation",
+        "interpret": {
+            "transformed_message": "I can hear how scared and angry you are about the immigration situation. You're dealing with so much uncertainty and betrayal. I'm here for you through all of this - you don't have to face it alone.",
+            "healing_score": 7,
+            "explanation": "Your friend is expressing deep fear about deportation, anger about betrayal, and the stress of legal troubles. They're using dark humor to cope but really need support and understanding.",
+            "subtext": "Feeling scared, betrayed, and overwhelmed by legal/immigration issues",
+            "needs": ["safety", "support", "loyalty", "someone who understands", "emotional validation"]
+        }
+    },
+    {
+        "name": "family_separation",
+        "pattern": _words("family", "families", "kids", "children", "sons?", "daughters?"),
+        "requires": _words("torn apart", "custody", "divorc(?:e|ed|ing)", "separat*", "split up", "taken away", "lost"),
+        "feeling": "heartbroken about what's happening to our family",
+        "interpret": {
+            "transformed_message": "I hear the pain in your words about your family being torn apart. You're right that we've both been through hell in different ways. I see you, I understand your struggle, and I'm grateful you're sharing this with me.",
+            "healing_score": 6,
+            "explanation": "They're sharing deep pain about family separation and life's unfairness, looking for connection with someone who understands similar struggles.",
+            "subtext": "Feeling isolated and hurt by family separation, seeking understanding from someone who relates",
+            "needs": ["empathy", "validation", "connection", "shared understanding"]
+        }
+    },
+    {
+        "name": "coparenting",
+        "pattern": _words("pick ?up", "drop ?off", "schools?", "schedules?", "weekends?", "the kids", "our son", "our daughter"),
+        "feeling": "stressed about how we're handling things for the kids",
+        "interpret": {
+            "transformed_message": "I can tell you're frustrated about how things are going with the kids' arrangements. I want this to work well for them too. Can we sit down and sort out the details together?",
+            "healing_score": 6,
+            "explanation": "They're frustrated about parenting logistics and want to feel the load and decisions are shared fairly.",
+            "subtext": "Worried about the children and feeling unsupported as a parent",
+            "needs": ["reliability", "fairness", "teamwork", "respect as a parent"]
+        }
+    },
+    {
+        "name": "household",
+        "pattern": _words("chores?", "dishes", "laundry", "clean(?:s|ed|ing)?", "house ?work", "help around", "mess(?:y|es)?", "trash"),
+        "feeling": "stretched thin with everything at home",
+        "interpret": {
+            "transformed_message": "It sounds like you're carrying too much at home and feeling alone with it. I don't want you to feel that way. Let's figure out together how I can take more of it on.",
+            "healing_score": 6,
+            "explanation": "They're overwhelmed by an uneven share of household work and want it to feel like a partnership.",
+            "subtext": "Feeling exhausted and taken for granted",
+            "needs": ["partnership", "fairness", "rest", "acknowledgement"]
+        }
+    },
+    {
+        "name": "appreciation",
+        "pattern": _words("apprecia*", "thank(?:s|ed|ful|less)?", "notic(?:e|es|ed|ing)", "taken for granted", "invisible", "recogni*"),
+        "feeling": "unseen lately",
+        "interpret": {
+            "transformed_message": "I hear that you've been feeling unappreciated, and I'm sorry. What you do matters to me a lot, and I want to be better at showing it.",
+            "healing_score": 6,
+            "explanation": "They're hurt that their effort goes unnoticed and want to feel valued.",
+            "subtext": "Feeling invisible and undervalued",
+            "needs": ["appreciation", "recognition", "feeling valued"]
+        }
+    },
+    {
+        "name": "connection",
+        "pattern": _words("ignor*", "listen(?:s|ed|ing)?", "alone", "lonely", "busy", "phones?", "no time", "never home", "distant"),
+        "feeling": "lonely and disconnected from you",
+        "interpret": {
+            "transformed_message": "It sounds like you've been feeling alone and not really heard by me. I miss being close too. Can we set aside some real time for each other?",
+            "healing_score": 6,
+            "explanation": "They feel neglected or unheard and are reaching out for closeness, even if it comes out as criticism.",
+            "subtext": "Missing connection and attention",
+            "needs": ["attention", "quality time", "being heard"]
+        }
+    },
+    {
+        "name": "money",
+        "pattern": _words("money", "bills?", "rent", "pay(?:s|ing|ment|ments)?", "paid", "spend(?:s|ing)?", "spent", "debts?", "afford(?:ed)?", "bank"),
+        "feeling": "anxious about money",
+        "interpret": {
+            "transformed_message": "I can tell money has been weighing on you. I don't want it to come between us. Let's look at the numbers together and make a plan we both feel okay about.",
+            "healing_score": 6,
+            "explanation": "Their anger is mostly financial stress and fear of instability.",
+            "subtext": "Worried about security and feeling out of control",
+            "needs": ["security", "transparency", "shared planning"]
+        }
+    },
+    {
+        "name": "work",
+        "pattern": _words("boss(?:es)?", "managers?", "deadlines?", "meetings?", "projects?", "coworkers?", "colleagues?", "shifts?"),
+        "feeling": "frustrated about how things are going at work",
+        "interpret": {
+            "transformed_message": "I can see you're frustrated with how this has been going at work. I'd like to understand what would make it easier for you, and see what we can change.",
+            "healing_score": 6,
+            "explanation": "They're stressed by workload or how work is being handled and want to feel respected and supported.",
+            "subtext": "Feeling pressured and not respected",
+            "needs": ["respect", "clarity", "support"]
+        }
+    }
+]
+
+_DEFAULT_THEME = {
+    "name": "general",
+    "feeling": "overwhelmed by everything happening",
+    "interpret": {
+        "transformed_message": "I can see you're dealing with so much pain and anger right now. Thank you for trusting me with these heavy feelings. I'm here to listen and support you however I can.",
+        "healing_score": 6,
+        "explanation": "They're sharing intense emotions and difficult circumstances, needing someone to witness their pain without judgment.",
+        "subtext": "Overwhelmed by multiple life challenges and needing emotional support",
+        "needs": ["validation", "emotional support", "someone to listen"]
+    }
+}
+
+_GENERIC_TRANSFORM = "I'm going through a really tough time and feeling overwhelmed by everything happening. I value our friendship and wanted to share what's on my mind. Can we talk?"
+
+# Blaming phrasings softened into observations, applied in order
+_SOFTENERS = [
+    (re.compile(r"\byou never\b", re.IGNORECASE), "it feels like you rarely"),
+    (re.compile(r"\byou always\b", re.IGNORECASE), "it often feels like you"),
+    (re.compile(r"\bwhy (?:can't|don't|won't) you(?: ever)?\b", re.IGNORECASE), "could you"),
+    (re.compile(r"\byou don't care\b", re.IGNORECASE), "I'm not feeling cared for"),
+    (re.compile(r"\byou're so\b", re.IGNORECASE), "it seems like you're"),
+    (re.compile(r"\b(?:fuck(?:ing)?|shit(?:ty)?|damn|bitch|asshole|stupid|idiot)\b\s*", re.IGNORECASE), ""),
+    (re.compile(r"([!?])[!?]+"), r"\1")
+]
+
+# Rewriting long messages clause by clause reads badly; use the theme template instead
+_MAX_REWRITE_CHARS = 280
+
+
+def detect_theme(message: str) -> dict:
+    """First theme whose keywords (and required keywords) appear in the message"""
+    for theme in _THEMES:
+        if theme["pattern"].search(message) and ("requires" not in theme or theme["requires"].search(message)):
+            return theme
+    return _DEFAULT_THEME
+
+
+def _soften(message: str) -> str:
+    text = message.strip()
+    if text.isupper():
+        text = text.capitalize()
+    for pattern, replacement in _SOFTENERS:
+        text = pattern.sub(replacement, text)
+    text = re.sub(r"\s+", " ", text).strip(" ,")
+    if text and text[-1] not in ".!?":
+        text += "?" if text.lower().startswith("could you") else "."
+    return text[:1].upper() + text[1:]
+
+
+def build_local_draft(message: str, message_type: str) -> AIResponse:
+    """Rule-based response built without a model call
+
+    Interpretations use the best matching theme template. Transformations
+    soften blaming phrasing in short messages and frame them with an
+    I-statement, or use a generic request to talk for long ones.
+    """
+    theme = detect_theme(message)
+    if message_type == "interpret":
+        return AIResponse(
+            sentiment="neutral", emotional_state="understanding",
+            model_used=FALLBACK_MODEL_NAME, model_id=FALLBACK_MODEL_ID,
+            **{**theme["interpret"], "needs": list(theme["interpret"]["needs"])}
+        )
+
+    softened = _soften(message) if len(message) <= _MAX_REWRITE_CHARS else ""
+    if softened:
+        transformed = f"I'm feeling {theme['feeling']}, and I want to share it kindly. {softened} Can we talk about it together?"
+        explanation = "Softened absolute and blaming words and framed the message around your feelings"
+    else:
+        transformed = _GENERIC_TRANSFORM
+        explanation = "Transformed the raw emotions into a request for connection and support"
+    return AIResponse(
+        transformed_message=transformed,
+        healing_score=5, sentiment="neutral", emotional_state="caring",
+        explanation=explanation,
+        model_used=FALLBACK_MODEL_NAME, model_id=FALLBACK_MODEL_ID
+    )
@@ -0,0 +1,266 @@
+"""
+Metrics Module
+The Third Voice - In-process counters and histograms with Prometheus text exposition
+"""
+
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+from ..config.settings import AppConfig
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def total(self, **match: str) -> float:
+        """Sum over series whose labels match the given values"""
+        indexes = [(self.labelnames.index(name), value) for name, value in match.items()]
+        return sum(v for labels, v in self.values().items() if all(labels[i] == value for i, value in indexes))
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], list] = {}  # {labels: [bucket counts..., sum, count]}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _snapshot(self) -> Dict[Tuple[str, ...], list]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return series[-1] if series else 0
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within buckets, like histogram_quantile()"""
+        with self._lock:
+            series = self._series.get(labels)
+            series = list(series) if series else None
+        if not series or not series[-1]:
+            return None
+        rank = q * series[-1]
+        cumulative = 0
+        lower = 0.0
+        for index, upper in enumerate(self.buckets):
+            count = series[index]
+            if cumulative + count >= rank and count:
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return lower
+
+    def render(self) -> list:
+        lines = []
+        for labels, series in sorted(self._snapshot().items()):
+            cumulative = 0
+            for index, upper in enumerate(self.buckets):
+                cumulative += series[index]
+                le = 'le="' + _format_value(upper) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics for the AI engine, renderable as Prometheus text"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+        self.model_requests = self.counter(
+            "thirdvoice_model_requests_total", "Model API calls by status class", ("model", "status"))
+        self.model_latency = self.histogram(
+            "thirdvoice_model_latency_seconds", "Model API call latency", ("model",))
+        self.model_failures = self.counter(
+            "thirdvoice_model_failures_total", "Failed model attempts by failure kind", ("model", "kind"))
+        self.parse_failures = self.counter(
+            "thirdvoice_model_parse_failures_total", "Model answers that could not be parsed", ("model",))
+        self.tokens = self.counter(
+            "thirdvoice_model_tokens_total", "Tokens used by model and direction", ("model", "direction"))
+        self.responses = self.counter(
+            "thirdvoice_responses_total", "Responses returned by source", ("source",))
+        self.cache_lookups = self.counter(
+            "thirdvoice_cache_lookups_total", "Response cache lookups by result", ("result",))
+        self.request_latency = self.histogram(
+            "thirdvoice_request_latency_seconds", "End-to-end time to a response", ("source",))
+        self.rate_limit_wait = self.histogram(
+            "thirdvoice_rate_limit_wait_seconds", "Time model calls queued for a rate limit slot", ("model",),
+            WAIT_BUCKETS)
+        self.rate_limit_skips = self.counter(
+            "thirdvoice_rate_limit_skips_total", "Model calls skipped because the rate limit wait was too long",
+            ("model",))
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def fallback_rate(self) -> float:
+        total = self.responses.total()
+        return self.responses.total(source="fallback") / total if total else 0.0
+
+    def cache_hit_rate(self) -> float:
+        total = self.cache_lookups.total()
+        return (total - self.cache_lookups.total(result="miss")) / total if total else 0.0
+
+    def model_summary(self) -> Dict[str, dict]:
+        """Per-model request, error, latency and token figures for dashboards"""
+        summary = {}
+        new_row = lambda: {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0}
+        for (model,) in self.rate_limit_skips.values():
+            summary.setdefault(model, new_row())
+        for (model, status), count in self.model_requests.values().items():
+            row = summary.setdefault(model, new_row())
+            row["requests"] += count
+            if status == "2xx":
+                row["ok"] += count
+            elif status == "429":
+                row["rate_limited"] += count
+            else:
+                row["errors"] += count
+        for model, row in summary.items():
+            row["success_rate"] = row["ok"] / row["requests"] if row["requests"] else 0.0
+            row["p50_seconds"] = self.model_latency.quantile(0.5, model)
+            row["p95_seconds"] = self.model_latency.quantile(0.95, model)
+            row["parse_failures"] = self.parse_failures.total(model=model)
+            row["tokens"] = self.tokens.total(model=model)
+            row["queue_p95_seconds"] = self.rate_limit_wait.quantile(0.95, model)
+            row["rate_limit_skips"] = self.rate_limit_skips.total(model=model)
+        return summary
+
+
+class MetricsServer:
+    """Serves GET /metrics from a daemon thread"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        print(f"📈 Metrics served at http://{host}:{self._server.server_address[1]}/metrics")
+
+
+_registry_instance: Optional[MetricsRegistry] = None
+_server_instance: Optional[MetricsServer] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry, starting the /metrics endpoint if enabled"""
+    global _registry_instance, _server_instance
+    if _registry_instance is None:
+        with _metrics_lock:
+            if _registry_instance is None:
+                _registry_instance = MetricsRegistry()
+                if AppConfig.METRICS_SERVER_ENABLED:
+                    try:
+                        _server_instance = MetricsServer(
+                            _registry_instance, AppConfig.METRICS_SERVER_HOST, AppConfig.METRICS_SERVER_PORT
+                        )
+                    except OSError as e:
+                        print(f"⚠️ Could not start metrics server: {e}")
+    return _registry_instance
@@ -0,0 +1,209 @@
+"""
+Model Health Module
+The Third Voice - Rolling per-model scoreboard with circuit breakers
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+from ..config.settings import AppConfig
+
+
+class ModelHealth:
+    """Rolling success rate, EWMA latency and circuit state for one model"""
+
+    def __init__(self, window: int):
+        self.outcomes = deque(maxlen=window)  # True for success, False for failure
+        self.latencies = deque(maxlen=window)  # Seconds taken by recent successful calls
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None      # Set while the circuit is open
+        self.trial_started_at: Optional[float] = None  # Half-open probe in flight
+        self.last_seen: Optional[float] = None      # Time of the last recorded call
+
+    @property
+    def success_rate(self) -> float:
+        """Smoothed success rate so untried models start at 50%"""
+        successes = sum(1 for outcome in self.outcomes if outcome)
+        return (successes + 1) / (len(self.outcomes) + 2)
+
+
+class ModelScoreboard:
+    """Tracks model health to order models and short-circuit failing ones"""
+
+    def __init__(self, window: int, ewma_alpha: float, failure_threshold: int,
+                 cooldown_seconds: float, default_latency: float):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.default_latency = default_latency
+        self._health = {}  # {model_id: ModelHealth}
+        self._lock = threading.Lock()
+
+    def _get(self, model_id: str) -> ModelHealth:
+        health = self._health.get(model_id)
+        if health is None:
+            health = self._health[model_id] = ModelHealth(self.window)
+        return health
+
+    def record_success(self, model_id: str, latency: float):
+        """Record a successful call and close the circuit"""
+        with self._lock:
+            health = self._get(model_id)
+            health.outcomes.append(True)
+            health.latencies.append(latency)
+            health.last_seen = time.monotonic()
+            if health.ewma_latency is None:
+                health.ewma_latency = latency
+            else:
+                health.ewma_latency += self.ewma_alpha * (latency - health.ewma_latency)
+            health.consecutive_failures = 0
+            health.opened_at = None
+            health.trial_started_at = None
+
+    def record_failure(self, model_id: str):
+        """Record a failed call, opening the circuit after repeated failures"""
+        with self._lock:
+            health = self._get(model_id)
+            health.outcomes.append(False)
+            health.last_seen = time.monotonic()
+            health.consecutive_failures += 1
+            if health.trial_started_at is not None or health.consecutive_failures >= self.failure_threshold:
+                if health.opened_at is None:
+                    print(f"🔌 Circuit opened for {model_id}")
+                health.opened_at = time.monotonic()
+            health.trial_started_at = None
+
+    def _state(self, health: ModelHealth, now: float) -> str:
+        if health.opened_at is None:
+            return "closed"
+        if now - health.opened_at < self.cooldown_seconds:
+            return "open"
+        return "half_open"
+
+    def _trial_free(self, health: ModelHealth, now: float) -> bool:
+        return health.trial_started_at is None or now - health.trial_started_at > self.cooldown_seconds
+
+    def allow(self, model_id: str) -> bool:
+        """Check whether a call may go to this model; half-open circuits admit one trial call"""
+        now = time.monotonic()
+        with self._lock:
+            health = self._get(model_id)
+            state = self._state(health, now)
+            if state == "closed":
+                return True
+            if state == "half_open" and self._trial_free(health, now):
+                health.trial_started_at = now
+                return True
+            return False
+
+    def ordered(self, models: List[dict]) -> List[dict]:
+        """Available models, best expected time-to-success first, ties in configured order"""
+        now = time.monotonic()
+        ranked = []
+        with self._lock:
+            for index, model_info in enumerate(models):
+                health = self._get(model_info["id"])
+                state = self._state(health, now)
+                if state == "open" or (state == "half_open" and not self._trial_free(health, now)):
+                    continue
+                latency = health.ewma_latency if health.ewma_latency is not None else self.default_latency
+                ranked.append((latency / health.success_rate, index, model_info))
+        ranked.sort(key=lambda item: (item[0], item[1]))
+        return [model_info for _, _, model_info in ranked]
+
+    def latency_percentile(self, model_id: str, percentile: float, min_samples: int = 5) -> Optional[float]:
+        """Latency at the given percentile of recent successful calls, or None with too few samples"""
+        with self._lock:
+            health = self._health.get(model_id)
+            samples = sorted(health.latencies) if health is not None else []
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def seconds_since_seen(self, model_id: str) -> Optional[float]:
+        """Time since the last call outcome for a model, or None if it was never called"""
+        with self._lock:
+            health = self._health.get(model_id)
+            if health is None or health.last_seen is None:
+                return None
+            return time.monotonic() - health.last_seen
+
+    def snapshot(self) -> dict:
+        """Per-model health summary for dashboards"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model_id: {
+                    "success_rate": health.success_rate,
+                    "ewma_latency": health.ewma_latency,
+                    "samples": len(health.outcomes),
+                    "consecutive_failures": health.consecutive_failures,
+                    "circuit": self._state(health, now)
+                }
+                for model_id, health in self._health.items()
+            }
+
+
+class HealthProber:
+    """Single background thread that sends one cheap probe per model at most once per TTL
+    
+    Models that saw real traffic within the TTL are not probed; their live
+    results already keep the scoreboard current.
+    """
+
+    def __init__(self, ttl_seconds: float, interval_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self._last_probe = {}  # {model_id: monotonic time of our last probe}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, models: List[dict], scoreboard: ModelScoreboard, probe: Callable[[dict], bool]):
+        """Start probing in the background; later calls are no-ops while the thread runs"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(models, scoreboard, probe),
+                name="model-health-prober", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, models: List[dict], scoreboard: ModelScoreboard, probe: Callable[[dict], bool]):
+        print("🩺 Model health prober started")
+        while True:
+            for model_info in models:
+                model_id = model_info["id"]
+                since_seen = scoreboard.seconds_since_seen(model_id)
+                if since_seen is not None and since_seen < self.ttl_seconds:
+                    continue
+                if time.monotonic() - self._last_probe.get(model_id, float("-inf")) < self.ttl_seconds:
+                    continue
+                self._last_probe[model_id] = time.monotonic()
+                try:
+                    healthy = probe(model_info)
+                    print(f"🩺 Probe {model_info['name']}: {'ok' if healthy else 'failed'}")
+                except Exception as e:
+                    print(f"⚠️ Probe failed for {model_info['name']}: {e}")
+            time.sleep(self.interval_seconds)
+
+
+_prober_instance: Optional[HealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_health_prober() -> HealthProber:
+    """Get the process-wide health prober"""
+    global _prober_instance
+    if _prober_instance is None:
+        with _prober_lock:
+            if _prober_instance is None:
+                _prober_instance = HealthProber(
+                    AppConfig.HEALTH_PROBE_TTL_SECONDS,
+                    AppConfig.HEALTH_PROBE_INTERVAL_SECONDS
+                )
+    return _prober_instance
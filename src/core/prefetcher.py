@@ -0,0 +1,157 @@
+"""
+Prefetcher Module
+The Third Voice - Debounced speculative requests that fill the cache before the user clicks
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .deadline import CancellationToken
+
+
+class _Proposal:
+    """The latest text one user might send, and its speculative run"""
+
+    def __init__(self, key: str, run: Callable[[CancellationToken], Any], due: float):
+        self.key = key
+        self.run = run
+        self.due = due
+        self.token = CancellationToken()
+        self.started = False
+        self.finished_at: Optional[float] = None
+
+
+class SpeculativePrefetcher:
+    """At most one speculative request per user, started once their text has been stable
+
+    A new proposal from the same user cancels the previous one, whether it
+    is still waiting out the debounce or already running. Runs start only
+    when busy() is false and the user is under max_per_hour, and use their
+    own small worker pool, so they never hold capacity real requests need.
+    """
+
+    # Finished proposals are remembered this long so re-proposing the same text is a no-op
+    FORGET_AFTER_SECONDS = 10 * 60
+
+    def __init__(self, debounce_seconds: float, max_per_hour: int, workers: int, busy: Callable[[], bool]):
+        self.debounce_seconds = debounce_seconds
+        self.max_per_hour = max_per_hour
+        self.busy = busy
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-speculative")
+        self._proposals = {}  # {user_id: _Proposal}
+        self._sent = {}       # {user_id: key of the request the user last sent}
+        self._started = {}    # {user_id: deque of start times within the last hour}
+        self._heap = []       # [(due, seq, user_id, proposal)]
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0
+        self.cancelled = 0
+
+    def propose(self, user_id: str, key: str, run: Callable[[CancellationToken], Any]):
+        """Schedule run(token) after the debounce unless the user proposes something else first
+
+        key identifies the request (e.g. its cache key); proposing the key
+        already scheduled, running or recently finished, or the key the user
+        last sent, does nothing.
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._sent.get(user_id) == key:
+                return
+            current = self._proposals.get(user_id)
+            if current is not None and current.key == key:
+                return
+            if current is not None:
+                self._cancel(current)
+            proposal = _Proposal(key, run, now + self.debounce_seconds)
+            self._proposals[user_id] = proposal
+            heapq.heappush(self._heap, (proposal.due, next(self._seq), user_id, proposal))
+            self._forget_finished(now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._schedule, name="speculative-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def mark_sent(self, user_id: str, key: str):
+        """Record that the user sent this request, so the text left in the box is not speculated again
+
+        A pending proposal for other text is cancelled; one for the same key
+        is left to finish, since the real request shares its call.
+        """
+        with self._cond:
+            self._sent[user_id] = key
+            current = self._proposals.get(user_id)
+            if current is not None and current.key != key:
+                del self._proposals[user_id]
+                self._cancel(current)
+
+    def withdraw(self, user_id: str):
+        """Cancel the user's speculative request, e.g. when their text was cleared"""
+        with self._cond:
+            proposal = self._proposals.pop(user_id, None)
+            if proposal is not None:
+                self._cancel(proposal)
+
+    def _cancel(self, proposal: _Proposal):
+        if proposal.started and proposal.finished_at is None:
+            self.cancelled += 1
+        proposal.token.cancel()
+
+    def _forget_finished(self, now: float):
+        cutoff = now - self.FORGET_AFTER_SECONDS
+        for user_id in [user_id for user_id, proposal in self._proposals.items()
+                        if proposal.finished_at is not None and proposal.finished_at < cutoff]:
+            del self._proposals[user_id]
+        # Start history is kept for the full hour the cap covers
+        for user_id in [user_id for user_id, started in self._started.items()
+                        if not self._trim_started(started, now)]:
+            del self._started[user_id]
+
+    @staticmethod
+    def _trim_started(started: deque, now: float) -> int:
+        """Drop start times older than an hour; returns how many remain"""
+        while started and started[0] < now - 3600:
+            started.popleft()
+        return len(started)
+
+    def _under_hourly_cap(self, user_id: str, now: float) -> bool:
+        return self._trim_started(self._started.setdefault(user_id, deque()), now) < self.max_per_hour
+
+    def _schedule(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, user_id, proposal = self._heap[0]
+                now = time.monotonic()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                if self._proposals.get(user_id) is not proposal or proposal.token.cancelled:
+                    continue
+                if not self._under_hourly_cap(user_id, now):
+                    continue  # Over budget; the real click will do the work
+                if self.busy():
+                    # Real requests come first; look again after another debounce
+                    heapq.heappush(self._heap, (now + self.debounce_seconds, next(self._seq), user_id, proposal))
+                    continue
+                proposal.started = True
+                self._started[user_id].append(now)
+                self.started += 1
+            self._executor.submit(self._execute, proposal)
+
+    def _execute(self, proposal: _Proposal):
+        try:
+            proposal.run(proposal.token)
+        except Exception as e:
+            print(f"⚠️ Speculative request failed: {e}")
+        finally:
+            with self._cond:
+                proposal.finished_at = time.monotonic()
@@ -0,0 +1,196 @@
+"""
+Rate Limiter Module
+The Third Voice - Process-wide token buckets that respect OpenRouter throttling
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from ..config.settings import AppConfig
+from .metrics import MetricsRegistry, get_metrics
+
+
+class TokenBucket:
+    """Token bucket that lets callers reserve a slot and wait for it"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, without taking it"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Take a token; the balance may go negative so later callers queue behind"""
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Per-model and per-API-key token buckets plus server-requested hold-offs
+
+    Each queue wait, and each call skipped because the wait was too long, is
+    also recorded per model on the metrics registry when one is given.
+    """
+
+    def __init__(self, model_rate: float, model_burst: float, key_rate: float, key_burst: float,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.model_rate = model_rate
+        self.model_burst = model_burst
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self._buckets = {}       # {("model" | "key", id): TokenBucket}
+        self._held_until = {}    # {model_id: monotonic time the server asked us to wait until}
+        self._lock = threading.Lock()
+        self.metrics = metrics
+
+        # Queue wait metrics
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.rejected = 0
+
+    def _bucket(self, kind: str, ident: str) -> TokenBucket:
+        bucket = self._buckets.get((kind, ident))
+        if bucket is None:
+            rate, burst = (self.model_rate, self.model_burst) if kind == "model" else (self.key_rate, self.key_burst)
+            bucket = self._buckets[(kind, ident)] = TokenBucket(rate, burst)
+        return bucket
+
+    def reserve(self, model_id: str, key_id: str, max_wait: float) -> Optional[float]:
+        """Reserve a call slot; returns the wait in seconds, or None if it would exceed max_wait"""
+        now = time.monotonic()
+        with self._lock:
+            model_bucket = self._bucket("model", model_id)
+            key_bucket = self._bucket("key", key_id)
+            wait = max(
+                model_bucket.wait_time(now),
+                key_bucket.wait_time(now),
+                self._held_until.get(model_id, now) - now
+            )
+            allowed = wait <= max_wait
+            if allowed:
+                model_bucket.take()
+                key_bucket.take()
+                self.waits += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            else:
+                self.rejected += 1
+        if self.metrics is not None:
+            if allowed:
+                self.metrics.rate_limit_wait.observe(max(0.0, wait), model_id)
+            else:
+                self.metrics.rate_limit_skips.inc(model_id)
+        return wait if allowed else None
+
+    def acquire(self, model_id: str, key_id: str, max_wait: float) -> bool:
+        """Block until a call slot is available; False if the wait would exceed max_wait"""
+        wait = self.reserve(model_id, key_id, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, model_id: str, key_id: str, max_wait: float) -> bool:
+        """Async counterpart of acquire"""
+        wait = self.reserve(model_id, key_id, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def hold_off(self, model_id: str, seconds: float):
+        """Stop sending calls to a model for the given time"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._held_until[model_id] = max(self._held_until.get(model_id, 0.0), until)
+        print(f"🚦 Holding off {model_id} for {seconds:.1f}s")
+
+    def blocked_for(self, model_id: str) -> float:
+        """Seconds left on a server-requested hold-off"""
+        with self._lock:
+            return max(0.0, self._held_until.get(model_id, 0.0) - time.monotonic())
+
+    def update_from_headers(self, model_id: str, status_code: int, headers):
+        """Apply Retry-After and X-RateLimit-* headers from a response"""
+        retry_after = self._parse_retry_after(headers.get("Retry-After"))
+        if retry_after is None and headers.get("X-RateLimit-Remaining") == "0":
+            retry_after = self._parse_reset(headers.get("X-RateLimit-Reset"))
+        if retry_after is None and status_code == 429:
+            retry_after = AppConfig.RATE_LIMIT_DEFAULT_RETRY_AFTER
+        if retry_after:
+            self.hold_off(model_id, retry_after)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After is either delta-seconds or an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_reset(value: Optional[str]) -> Optional[float]:
+        """X-RateLimit-Reset may be epoch milliseconds, epoch seconds or a delay in seconds"""
+        if not value:
+            return None
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        if reset > 1e12:
+            reset = reset / 1000 - time.time()
+        elif reset > 1e9:
+            reset = reset - time.time()
+        return max(0.0, reset)
+
+    def stats(self) -> dict:
+        """Queue wait metrics"""
+        return {
+            "acquired": self.waits,
+            "rejected": self.rejected,
+            "total_wait_seconds": self.total_wait_seconds,
+            "avg_wait_seconds": self.total_wait_seconds / self.waits if self.waits else 0.0,
+            "max_wait_seconds": self.max_wait_seconds
+        }
+
+
+_limiter_instance: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter"""
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = RateLimiter(
+                    model_rate=AppConfig.RATE_LIMIT_MODEL_PER_MINUTE / 60,
+                    model_burst=AppConfig.RATE_LIMIT_MODEL_BURST,
+                    key_rate=AppConfig.RATE_LIMIT_KEY_PER_MINUTE / 60,
+                    key_burst=AppConfig.RATE_LIMIT_KEY_BURST,
+                    metrics=get_metrics()
+                )
+    return _limiter_instance
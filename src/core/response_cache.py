@@ -0,0 +1,61 @@
+"""
+Response Cache Module
+The Third Voice - In-process LRU cache in front of the Supabase response cache
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..data.models import AIResponse
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of AI responses with size and TTL eviction"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # {cache_key: (expires_at, AIResponse)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key: str) -> Optional[AIResponse]:
+        """Return a fresh cached response and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return response
+
+    def peek(self, cache_key: str) -> bool:
+        """True if a fresh entry exists; does not count as a hit or change LRU order"""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, cache_key: str, response: AIResponse):
+        """Store a response, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
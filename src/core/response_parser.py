@@ -0,0 +1,166 @@
+"""
+Response Parser Module
+The Third Voice - Tolerant JSON extraction and schema checks for model output
+"""
+
+import json
+from typing import Optional
+
+# Literals models sometimes emit in Python or JavaScript style
+_LITERALS = {"True": "true", "False": "false", "None": "null", "undefined": "null"}
+_OPEN_QUOTES = {'"': '"', "'": "'", "“": "”"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def extract_json_object(text: str) -> Optional[dict]:
+    """Find the first JSON object in model output and repair minor syntax errors in one pass
+
+    Skips code fences and surrounding prose, and tolerates single or curly
+    quotes, unquoted keys, raw newlines inside strings, trailing commas, Python
+    literals and output that was cut off before the closing braces. A member
+    cut off before its value is complete is dropped:
+
+    >>> extract_json_object('{"transformed_message": "a", "healing_score": 7, "expl')
+    {'transformed_message': 'a', 'healing_score': 7}
+    >>> extract_json_object('{"transformed_message": "a", "explanation":')
+    {'transformed_message': 'a'}
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    out = []
+    closers = []        # Expected closing brackets, innermost last
+    members = []        # Where the current member of each open bracket starts in out
+    quote = None        # Closing quote of the string we are inside, if any
+    index = start
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if quote is not None:
+            if char == "\\" and index + 1 < length:
+                nxt = text[index + 1]
+                # \' is not valid JSON; an escaped single quote is just a quote
+                out.append("'" if nxt == "'" else char + nxt)
+                index += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')   # Double quote inside a single/curly-quoted string
+            else:
+                out.append(_STRING_ESCAPES.get(char, char))
+            index += 1
+            continue
+
+        if char in _OPEN_QUOTES:
+            quote = _OPEN_QUOTES[char]
+            out.append('"')
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+            members.append(len(out))
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if closers:
+                closers.pop()
+                members.pop()
+            out.append(char)
+            if not closers:
+                break
+        elif char == "," and members:
+            members[-1] = len(out)
+            out.append(char)
+        elif char.isalpha():
+            end = index
+            while end < length and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[index:end]
+            after = end
+            while after < length and text[after].isspace():
+                after += 1
+            if after < length and text[after] == ":":
+                out.append(f'"{word}"')    # Unquoted key
+            else:
+                out.append(_LITERALS.get(word, word))
+            index = end
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    # Truncated output: close the open string and brackets
+    if quote is not None:
+        out.append('"')
+    data = _close_and_parse(out, closers)
+    # Still invalid: the cut was in a key, after a colon or inside a literal, so drop
+    # that member (and its comma), then the whole innermost container, and so on outwards
+    level = len(members)
+    while data is None and level:
+        level -= 1
+        del out[members[level]:]
+        data = _close_and_parse(out, closers[:level + 1])
+    return data
+
+
+def _close_and_parse(out: list, closers: list) -> Optional[dict]:
+    """Append the missing closing brackets and parse; None unless the result is an object"""
+    out = list(out)
+    for closer in reversed(closers):
+        _strip_trailing_comma(out)
+        out.append(closer)
+    try:
+        data = json.loads("".join(out))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _strip_trailing_comma(out: list):
+    """Drop a comma (and whitespace after it) right before a closing bracket"""
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index:]
+
+
+def validate_ai_payload(data: dict) -> Optional[dict]:
+    """Check parsed model output against the response schema and normalize field types
+
+    Returns None when the required transformed_message is missing or empty.
+    """
+    message = data.get("transformed_message")
+    if not isinstance(message, str) or not message.strip():
+        return None
+
+    try:
+        healing_score = int(round(float(data.get("healing_score", 5))))
+    except (TypeError, ValueError):
+        healing_score = 5
+
+    return {
+        "transformed_message": message.strip(),
+        "healing_score": max(0, min(10, healing_score)),
+        "sentiment": _as_text(data.get("sentiment"), "neutral"),
+        "emotional_state": _as_text(data.get("emotional_state"), "understanding"),
+        "explanation": _as_text(data.get("explanation"), "Providing support"),
+        "subtext": _as_text(data.get("subtext"), ""),
+        "needs": _as_text_list(data.get("needs")),
+        "warnings": _as_text_list(data.get("warnings"))
+    }
+
+
+def _as_text(value, default: str) -> str:
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return default
+
+
+def _as_text_list(value) -> list:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if str(item).strip()]
@@ -0,0 +1,155 @@
+"""
+Similarity Cache Module
+The Third Voice - Near-duplicate response lookups via SimHash fingerprints
+"""
+
+import hashlib
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from ..data.models import AIResponse
+
+FINGERPRINT_BITS = 64
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+_CAPITALIZED_PATTERN = re.compile(r"\b[A-Z][A-Za-z0-9']*")
+_NEGATIONS = frozenset({
+    "no", "not", "never", "nor", "none", "nothing", "nobody", "nowhere", "neither", "cannot",
+    "dont", "doesnt", "didnt", "cant", "wont", "isnt", "arent", "wasnt", "werent",
+    "shouldnt", "wouldnt", "couldnt", "havent", "hasnt", "hadnt"
+})
+_PRONOUN_I = frozenset({"i", "i'm", "i've", "i'll", "i'd"})
+
+
+def normalize_text(text: str) -> list:
+    """Lowercase word tokens with punctuation and extra whitespace removed"""
+    return [token.strip("'") for token in _TOKEN_PATTERN.findall(text.lower()) if token.strip("'")]
+
+
+def exact_tokens(text: str) -> tuple:
+    """Negations, numbers and capitalized words (names); near-duplicates must agree on all of them
+
+    SimHash barely moves when one of these changes, yet each can flip the
+    meaning of a message or belong to one person.
+    """
+    required = {token for token in normalize_text(text)
+                if token in _NEGATIONS or token.endswith("n't") or any(char.isdigit() for char in token)}
+    required.update(word.lower().strip("'") for word in _CAPITALIZED_PATTERN.findall(text))
+    return tuple(sorted(required - _PRONOUN_I))
+
+
+def simhash(tokens: list) -> int:
+    """64-bit SimHash over word unigrams and bigrams"""
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    digests = b"".join(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest() for feature in features)
+    # One row of 64 bits per feature; a bit is set when most features set it
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), FINGERPRINT_BITS)
+    majority = bits.sum(axis=0) * 2 > len(features)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+class SimilarityCache:
+    """Near-duplicate AI response cache within a caller-chosen scope
+
+    Similarity is 1 - hamming_distance / 64 between SimHash fingerprints, and
+    only entries with the same exact_tokens() as the query are compared.
+    Entries are indexed with multi-index hashing: the fingerprint is split into
+    a few bands, and any entry within max_distance must differ from the query
+    by at most max_distance // bands bits in some band. Lookups probe only those
+    nearby band values, so the number of compared entries stays a small
+    fraction of the cache as it grows.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float, min_tokens: int,
+                 bands: int = 4):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.max_distance = max(0, int((1 - threshold) * FINGERPRINT_BITS))
+
+        # Band layout and the bit flips to probe within each band
+        widths = [FINGERPRINT_BITS // bands + (1 if i < FINGERPRINT_BITS % bands else 0) for i in range(bands)]
+        self._band_layout = [(sum(widths[:i]), width) for i, width in enumerate(widths)]
+        radius = self.max_distance // bands
+        self._probe_masks = [
+            [sum(1 << bit for bit in flipped)
+             for r in range(radius + 1) for flipped in itertools.combinations(range(width), r)]
+            for _, width in self._band_layout
+        ]
+        self._entries = OrderedDict()  # {entry_key: (scope, fingerprint, expires_at, AIResponse)}
+        self._buckets = {}             # {(scope, band_index, band_value): set(entry_key)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bands(self, fingerprint: int):
+        for index, (offset, width) in enumerate(self._band_layout):
+            yield index, (fingerprint >> offset) & ((1 << width) - 1)
+
+    def _fingerprint(self, message: str) -> Optional[int]:
+        tokens = normalize_text(message)
+        if len(tokens) < self.min_tokens:
+            return None  # Too short to compare safely
+        return simhash(tokens)
+
+    def get(self, scope: str, message: str) -> Optional[AIResponse]:
+        """Return the closest fresh response within the similarity threshold"""
+        fingerprint = self._fingerprint(message)
+        if fingerprint is None:
+            return None
+        scope = (scope, exact_tokens(message))
+        now = time.monotonic()
+        with self._lock:
+            candidates = set()
+            for index, value in self._bands(fingerprint):
+                for mask in self._probe_masks[index]:
+                    bucket = self._buckets.get((scope, index, value ^ mask))
+                    if bucket:
+                        candidates.update(bucket)
+            best_key, best_distance = None, self.max_distance + 1
+            for entry_key in candidates:
+                _, entry_fingerprint, expires_at, _ = self._entries[entry_key]
+                if expires_at <= now:
+                    continue
+                distance = (fingerprint ^ entry_fingerprint).bit_count()
+                if distance < best_distance:
+                    best_key, best_distance = entry_key, distance
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][3]
+
+    def set(self, scope: str, message: str, response: AIResponse):
+        """Index a response under the message fingerprint"""
+        fingerprint = self._fingerprint(message)
+        if fingerprint is None:
+            return
+        scope = (scope, exact_tokens(message))
+        entry_key = (scope, fingerprint)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            self._entries[entry_key] = (scope, fingerprint, time.monotonic() + self.ttl_seconds, response)
+            for index, value in self._bands(fingerprint):
+                self._buckets.setdefault((scope, index, value), set()).add(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_key):
+        scope, fingerprint, _, _ = self._entries.pop(entry_key)
+        for index, value in self._bands(fingerprint):
+            bucket = self._buckets.get((scope, index, value))
+            if bucket is not None:
+                bucket.discard(entry_key)
+                if not bucket:
+                    del self._buckets[(scope, index, value)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
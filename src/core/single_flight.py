@@ -0,0 +1,102 @@
+"""
+Single Flight Module
+The Third Voice - Coalesces identical concurrent requests onto one upstream call
+"""
+
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from .deadline import CancellationToken
+
+
+class _Call:
+    """One in-flight upstream call and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = Future()
+        self.waiters = 0
+        self.cancelled = False  # The leader gave up; followers should not use its result
+
+    def wait(self, timeout: Optional[float], token: Optional[CancellationToken] = None) -> Tuple[bool, Any]:
+        """Wait for the leader, or until the follower's own token is cancelled; returns (finished, result)"""
+        waiting = [self.done] if token is None else [self.done, token.future]
+        wait(waiting, timeout, return_when=FIRST_COMPLETED)
+        finished = self.done.done()
+        return finished, self.done.result() if finished else None
+
+
+class SingleFlight:
+    """Keyed registry of in-flight calls; the first caller leads, later ones share its result
+
+    Works across threads and event loops: followers block on a Future
+    (async followers wait for it in a worker thread). If the leader is
+    cancelled, waiting followers elect a new leader and run the call themselves.
+    """
+
+    def __init__(self):
+        self._calls = {}  # {key: _Call}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key: str) -> Tuple[_Call, bool]:
+        """Register interest in key; returns (call, is_leader)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def finish(self, key: str, call: _Call, result: Any, cancelled: bool = False):
+        """Publish the leader's result and release the followers"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.cancelled = cancelled
+        call.done.set_result(result)
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None,
+           token: Optional[CancellationToken] = None) -> Tuple[Any, bool]:
+        """Run fn once per key at a time; returns (result, shared)
+
+        Followers that give up after timeout, or whose token is cancelled,
+        get (None, True).
+        """
+        while True:
+            call, leader = self.join(key)
+            if leader:
+                break
+            finished, result = call.wait(timeout, token)
+            if not (finished and call.cancelled):
+                return result, True
+        result = None
+        try:
+            result = fn()
+            return result, False
+        finally:
+            self.finish(key, call, result, token is not None and token.cancelled)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None,
+                  token: Optional[CancellationToken] = None) -> Tuple[Any, bool]:
+        """Async counterpart of do"""
+        while True:
+            call, leader = self.join(key)
+            if leader:
+                break
+            finished, result = await asyncio.to_thread(call.wait, timeout, token)
+            if not (finished and call.cancelled):
+                return result, True
+        result = None
+        try:
+            result = await fn()
+            return result, False
+        finally:
+            self.finish(key, call, result, token is not None and token.cancelled)
@@ -0,0 +1,85 @@
+"""
+Streaming Module
+The Third Voice - Incremental rendering of streamed model output
+"""
+
+import json
+from typing import Iterator, Optional
+
+from ..data.models import AIResponse
+
+
+class TransformedMessageExtractor:
+    """Pull the transformed_message string out of partial JSON as it streams in"""
+
+    FIELD = '"transformed_message"'
+
+    def __init__(self):
+        self.buffer = ""
+        self.value_start: Optional[int] = None  # Index just past the opening quote
+        self.pos = 0                            # Next unread index inside the value
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add streamed text and return any newly decoded message text"""
+        if self.done:
+            return ""
+        self.buffer += chunk
+        if self.value_start is None and not self._find_value_start():
+            return ""
+
+        out = []
+        buffer = self.buffer
+        while self.pos < len(buffer):
+            char = buffer[self.pos]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                out.append(char)
+                self.pos += 1
+                continue
+            # Escapes may be split across chunks - wait for the rest
+            if self.pos + 1 >= len(buffer):
+                break
+            length = 6 if buffer[self.pos + 1] == "u" else 2
+            if self.pos + length > len(buffer):
+                break
+            try:
+                out.append(json.loads(f'"{buffer[self.pos:self.pos + length]}"'))
+            except ValueError:
+                out.append(buffer[self.pos + 1:self.pos + length])
+            self.pos += length
+        return "".join(out)
+
+    def _find_value_start(self) -> bool:
+        key_at = self.buffer.find(self.FIELD)
+        if key_at < 0:
+            return False
+        index = key_at + len(self.FIELD)
+        # Skip whitespace and the colon up to the opening quote
+        while index < len(self.buffer) and self.buffer[index] in " \t\r\n:":
+            index += 1
+        if index >= len(self.buffer) or self.buffer[index] != '"':
+            return False
+        self.value_start = self.pos = index + 1
+        return True
+
+
+class AIResponseStream:
+    """Iterable of message text for st.write_stream; holds the parsed AIResponse once exhausted
+    
+    The wrapped generator yields text chunks and finally the AIResponse itself,
+    which is kept on .response instead of being passed on to the caller.
+    """
+
+    def __init__(self, items: Iterator):
+        self._items = items
+        self.response: Optional[AIResponse] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for item in self._items:
+            if isinstance(item, AIResponse):
+                self.response = item
+            else:
+                yield item
@@ -0,0 +1,87 @@
+"""
+Token Budget Module
+The Third Voice - Input compression and per-mode output token budgets
+"""
+
+import re
+import threading
+from collections import deque
+from typing import Dict
+
+_QUOTE_MARKER = re.compile(r"^\s*(?:>\s*)+", re.MULTILINE)
+_REPEATED_PUNCTUATION = re.compile(r"([!?.,*~_-])\1{2,}")
+_INLINE_WHITESPACE = re.compile(r"[ \t\u00a0\u200b]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about 4 characters or 0.75 words per token)"""
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(text.split()) * 1.3)) + 1
+
+
+def compress_message(text: str, max_tokens: int) -> str:
+    """Normalize pasted text and trim it to roughly max_tokens, keeping its start and end
+
+    Strips email-style quote markers, collapses whitespace and runs of repeated
+    punctuation, and drops consecutive duplicate lines.
+    """
+    text = _QUOTE_MARKER.sub("", text)
+    text = _INLINE_WHITESPACE.sub(" ", text)
+    text = _REPEATED_PUNCTUATION.sub(r"\1\1", text)
+    lines = []
+    for line in _BLANK_LINES.sub("\n\n", text).split("\n"):
+        line = line.strip()
+        if not lines or line != lines[-1]:
+            lines.append(line)
+    text = "\n".join(lines).strip()
+
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Keep the opening and the closing, which carry most of the meaning
+    keep_chars = max_tokens * 4
+    head = text[:keep_chars * 2 // 3].rsplit(" ", 1)[0]
+    tail = text[-(keep_chars // 3):].split(" ", 1)[-1]
+    return f"{head} … {tail}"
+
+
+class OutputBudget:
+    """Chooses max_tokens per message type from observed completion lengths"""
+
+    def __init__(self, defaults: Dict[str, int], floor: int, ceiling: int, percentile: float,
+                 headroom: float, window: int, min_samples: int):
+        self.defaults = defaults
+        self.floor = floor
+        self.ceiling = ceiling
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self._window = window
+        self._samples = {}  # {message_type: deque of completion token counts}
+        self._lock = threading.Lock()
+
+    def record(self, message_type: str, completion_tokens: int, truncated: bool = False):
+        """Record an observed completion length; truncated outputs count double so budgets grow"""
+        with self._lock:
+            samples = self._samples.setdefault(message_type, deque(maxlen=self._window))
+            samples.append(completion_tokens * 2 if truncated else completion_tokens)
+
+    def max_tokens(self, message_type: str, input_tokens: int = 0) -> int:
+        """Budget for the next call: a high percentile of recent outputs plus headroom"""
+        with self._lock:
+            samples = sorted(self._samples.get(message_type, ()))
+        if len(samples) < self.min_samples:
+            budget = self.defaults.get(message_type, self.ceiling)
+        else:
+            index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+            budget = int(samples[index] * self.headroom)
+        # Rewrites grow with the input, so never budget less than the input itself
+        budget = max(budget, input_tokens + self.floor)
+        return max(self.floor, min(self.ceiling, budget))
+
+    def snapshot(self) -> Dict[str, int]:
+        """Current budget per message type"""
+        with self._lock:
+            message_types = set(self.defaults) | set(self._samples)
+        return {message_type: self.max_tokens(message_type) for message_type in message_types}
@@ -2,7 +2,7 @@
 Data models and database management for The Third Voice AI
 """
 
-from .models import Contact, Message, AIResponse
+from .models import Contact, Message, AIResponse, BatchResult
 from .database import DatabaseManager
 
-__all__ = ['Contact', 'Message', 'AIResponse', 'DatabaseManager']
+__all__ = ['Contact', 'Message', 'AIResponse', 'BatchResult', 'DatabaseManager']
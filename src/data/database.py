@@ -5,7 +5,7 @@ Supabase database wrapper with error handling and demo user support
 
 import streamlit as st
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Callable, List, Optional
 from supabase import create_client, Client
 import uuid
 
@@ -27,6 +27,22 @@ class DatabaseManager:
         self._demo_messages = {}  # {user_id: [messages]}
         self._demo_feedback = {}  # {user_id: [feedback]}
         self._demo_cache = {}     # {user_id: {cache_key: response}}
+        
+        # Called as listener(user_id, contact_id, message_type, original, ai_response) after each saved message
+        self._message_listeners: List[Callable] = []
+    
+    def add_message_listener(self, listener: Callable):
+        """Register a callback for successfully saved messages"""
+        self._message_listeners.append(listener)
+    
+    def _notify_message_saved(self, user_id: str, contact_id: str, message_type: str,
+                              original: str, ai_response: AIResponse):
+        """Tell listeners about a saved message; listener errors never fail the save"""
+        for listener in self._message_listeners:
+            try:
+                listener(user_id, contact_id, message_type, original, ai_response)
+            except Exception as e:
+                print(f"⚠️ Message listener failed: {str(e)}")
     
     def _is_demo_user(self, user_id: str) -> bool:
         """Check if this is a demo user"""
@@ -51,17 +67,7 @@ class DatabaseManager:
         # Regular database logic
         try:
             response = self.supabase.table("contacts").select("*").eq("user_id", user_id).execute()
-            contacts = []
-            for contact_data in response.data:
-                contacts.append(Contact(
-                    id=contact_data["id"],
-                    name=contact_data["name"],
-                    context=contact_data["context"],
-                    user_id=contact_data["user_id"],
-                    created_at=datetime.fromisoformat(contact_data["created_at"].replace('Z', '+00:00')),
-                    updated_at=datetime.fromisoformat(contact_data["updated_at"].replace('Z', '+00:00'))
-                ))
-            return contacts
+            return Contact.from_rows(response.data)
         except Exception as e:
             st.error(f"Error fetching contacts: {str(e)}")
             return []
@@ -80,15 +86,7 @@ class DatabaseManager:
             }
             response = self.supabase.table("contacts").insert(contact_data).execute()
             if response.data:
-                data = response.data[0]
-                return Contact(
-                    id=data["id"],
-                    name=data["name"],
-                    context=data["context"],
-                    user_id=data["user_id"],
-                    created_at=datetime.fromisoformat(data["created_at"].replace('Z', '+00:00')),
-                    updated_at=datetime.fromisoformat(data["updated_at"].replace('Z', '+00:00'))
-                )
+                return Contact.from_row(response.data[0])
             return None
         except Exception as e:
             st.error(f"Error creating contact: {str(e)}")
@@ -115,8 +113,11 @@ class DatabaseManager:
                     original: str, result: str, user_id: str, ai_response: AIResponse) -> bool:
         """Save a message to the database (demo-aware)"""
         if self._is_demo_user(user_id):
-            return self._save_demo_message(contact_id, contact_name, message_type,
-                                         original, result, user_id, ai_response)
+            saved = self._save_demo_message(contact_id, contact_name, message_type,
+                                            original, result, user_id, ai_response)
+            if saved:
+                self._notify_message_saved(user_id, contact_id, message_type, original, ai_response)
+            return saved
         
         # Regular database logic
         try:
@@ -133,7 +134,10 @@ class DatabaseManager:
                 "user_id": user_id
             }
             response = self.supabase.table("messages").insert(message_data).execute()
-            return len(response.data) > 0
+            saved = len(response.data) > 0
+            if saved:
+                self._notify_message_saved(user_id, contact_id, message_type, original, ai_response)
+            return saved
         except Exception as e:
             st.error(f"Error saving message: {str(e)}")
             return False
@@ -179,23 +183,7 @@ class DatabaseManager:
                        .limit(50)
                        .execute())
             
-            messages = []
-            for msg_data in response.data:
-                messages.append(Message(
-                    id=msg_data["id"],
-                    contact_id=msg_data["contact_id"],
-                    contact_name=msg_data["contact_name"],
-                    type=msg_data["type"],
-                    original=msg_data["original"],
-                    result=msg_data.get("result"),
-                    sentiment=msg_data.get("sentiment"),
-                    emotional_state=msg_data.get("emotional_state"),
-                    model=msg_data.get("model"),
-                    healing_score=msg_data.get("healing_score"),
-                    user_id=msg_data["user_id"],
-                    created_at=datetime.fromisoformat(msg_data["created_at"].replace('Z', '+00:00'))
-                ))
-            return messages
+            return Message.from_rows(response.data)
         except Exception as e:
             st.error(f"Error fetching conversation history: {str(e)}")
             return []
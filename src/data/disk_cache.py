@@ -0,0 +1,132 @@
+"""
+Disk Cache Module for The Third Voice AI
+Persistent SQLite response cache shared by every Streamlit worker process on one node
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, fields
+from typing import Optional
+
+from .models import AIResponse
+
+_AI_RESPONSE_FIELDS = {field.name for field in fields(AIResponse)}
+
+
+class DiskCache:
+    """Size-bounded LRU response cache with TTL in a single SQLite file
+
+    Uses the same check_cache/save_to_cache interface as DatabaseManager.
+    Entries are keyed by message_hash alone: the hash already covers the
+    prompt version, message, context and mode, so like the in-process cache
+    an answer is shared by everyone who sends the same message.
+
+    WAL mode and a busy timeout make concurrent readers and writers in
+    several processes safe. Each thread uses its own connection.
+    """
+
+    # Hits only refresh last_used when it is older than this, to keep reads mostly read-only
+    TOUCH_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, evict_every: int = 50):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    message_hash TEXT PRIMARY KEY,
+                    context TEXT,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def check_cache(self, contact_id: str, message_hash: str, user_id: str) -> Optional[AIResponse]:
+        """Return a fresh cached response and mark it as recently used"""
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, last_used FROM responses WHERE message_hash = ? AND expires_at > ?",
+                (message_hash, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] < now - self.TOUCH_INTERVAL_SECONDS:
+                conn.execute("UPDATE responses SET last_used = ? WHERE message_hash = ?", (now, message_hash))
+            data = json.loads(row[0])
+            response = AIResponse(**{key: value for key, value in data.items() if key in _AI_RESPONSE_FIELDS})
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            print(f"⚠️ Disk cache read failed: {str(e)}")
+            return None
+        self.hits += 1
+        return response
+
+    def save_to_cache(self, contact_id: str, message_hash: str, context: str,
+                      response: str, user_id: str, ai_response: AIResponse) -> bool:
+        """Store a response, evicting expired and least recently used entries now and then"""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (message_hash, context, response, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (message_hash, context, json.dumps(asdict(ai_response)), now + self.ttl_seconds, now)
+            )
+            with self._lock:
+                self._writes += 1
+                evict = self._writes % self.evict_every == 0
+            if evict:
+                self._evict(conn, now)
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache write failed: {str(e)}")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM responses WHERE message_hash IN "
+            "(SELECT message_hash FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear_cache_entry(self, contact_id: str, message_hash: str, user_id: str) -> bool:
+        """Clear a specific cache entry"""
+        try:
+            self._connection().execute("DELETE FROM responses WHERE message_hash = ?", (message_hash,))
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache delete failed: {str(e)}")
+            return False
+
+    def __len__(self) -> int:
+        try:
+            return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            return 0
@@ -3,12 +3,25 @@ Data Models for The Third Voice AI
 Defines the core data structures used throughout the application
 """
 
+import sys
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 
-@dataclass
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Share one copy of low-cardinality strings (contexts, modes, sentiments, model names)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Supabase ISO timestamp; cached because reruns decode the same rows again"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+@dataclass(slots=True)
 class Contact:
     """Contact data model"""
     id: str
@@ -18,8 +31,23 @@ class Contact:
     created_at: datetime
     updated_at: datetime
 
+    def __post_init__(self):
+        self.context = _intern(self.context)
 
-@dataclass
+    @classmethod
+    def from_row(cls, row: dict) -> "Contact":
+        """Build a contact from a Supabase contacts row"""
+        return cls(
+            row["id"], row["name"], row["context"], row["user_id"],
+            parse_timestamp(row["created_at"]), parse_timestamp(row["updated_at"])
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> List["Contact"]:
+        return [cls.from_row(row) for row in rows]
+
+
+@dataclass(slots=True)
 class Message:
     """Message data model"""
     id: str
@@ -35,8 +63,28 @@ class Message:
     user_id: str
     created_at: datetime
 
+    def __post_init__(self):
+        self.type = _intern(self.type)
+        self.sentiment = _intern(self.sentiment)
+        self.emotional_state = _intern(self.emotional_state)
+        self.model = _intern(self.model)
 
-@dataclass
+    @classmethod
+    def from_row(cls, row: dict) -> "Message":
+        """Build a message from a Supabase messages row"""
+        get = row.get
+        return cls(
+            row["id"], row["contact_id"], row["contact_name"], row["type"], row["original"],
+            get("result"), get("sentiment"), get("emotional_state"), get("model"), get("healing_score"),
+            row["user_id"], parse_timestamp(row["created_at"])
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> List["Message"]:
+        return [cls.from_row(row) for row in rows]
+
+
+@dataclass(slots=True)
 class AIResponse:
     """AI response data model"""
     transformed_message: str
@@ -55,6 +103,10 @@ class AIResponse:
             self.needs = []
         if self.warnings is None:
             self.warnings = []
+        self.sentiment = _intern(self.sentiment)
+        self.emotional_state = _intern(self.emotional_state)
+        self.model_used = _intern(self.model_used)
+        self.model_id = _intern(self.model_id)
 
     @property
     def model_display(self) -> str:
@@ -81,3 +133,17 @@ class AIResponse:
             "display_text": self.model_display,
             "is_fallback": self.is_fallback_response
         }
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one item in a batch processing run"""
+    index: int                          # Position of the item in the input list
+    response: Optional[AIResponse]
+    error: str = ""
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Check if this item got a model answer (fallback responses carry an error)"""
+        return self.response is not None and not self.error
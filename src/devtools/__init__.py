@@ -0,0 +1,7 @@
+"""
+Developer tools for The Third Voice AI (not used by the app at runtime)
+"""
+
+from .mock_openrouter import MockOpenRouter
+
+__all__ = ['MockOpenRouter']
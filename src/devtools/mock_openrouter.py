@@ -0,0 +1,247 @@
+"""
+Mock OpenRouter Module
+The Third Voice - Local stand-in for the OpenRouter chat completions API
+
+Serves POST .../chat/completions (plain and streaming) with per-model latency,
+error, 429, malformed-JSON and refusal injection so AIEngine can be exercised
+without spending real quota. Run it with:
+
+    python -m src.devtools.mock_openrouter --port 8765 --config faults.json
+
+and point the engine at it with OPENROUTER_BASE_URL=http://127.0.0.1:8765/api/v1.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Behaviour for models without their own entry; every key can be overridden per model
+DEFAULT_PROFILE = {
+    "latency_median": 1.5,      # Seconds to a complete answer (lognormal median)
+    "latency_sigma": 0.5,       # Lognormal shape; 0 gives a fixed latency
+    "latency_max": 60.0,
+    "error_rate": 0.0,          # 500 responses
+    "rate_limit_rate": 0.0,     # 429 responses with Retry-After
+    "retry_after": 5,
+    "moderation_rate": 0.0,     # 403 "flagged by moderation" responses
+    "refusal_rate": 0.0,        # 200 responses that decline in plain text
+    "malformed_rate": 0.0,      # 200 responses with broken JSON content
+    "stream_chunk_chars": 12    # Characters per streamed delta
+}
+
+_QUOTED_MESSAGE = re.compile(r'"(.*)"\s*$', re.DOTALL)
+
+
+class MockOpenRouter:
+    """Fault-injecting chat completions server running on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, profiles: Optional[dict] = None,
+                 seed: Optional[int] = None):
+        profiles = profiles or {}
+        self.default_profile = {**DEFAULT_PROFILE, **profiles.get("default", {})}
+        self.model_profiles = profiles.get("models", {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Value to use for OPENROUTER_BASE_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def profile(self, model_id: str) -> dict:
+        return {**self.default_profile, **self.model_profiles.get(model_id, {})}
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def _latency(self, profile: dict) -> float:
+        with self._lock:
+            latency = self._random.lognormvariate(0, profile["latency_sigma"]) * profile["latency_median"]
+        return min(latency, profile["latency_max"])
+
+    def start(self) -> "MockOpenRouter":
+        """Serve in a daemon thread; returns self for chaining"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-openrouter", daemon=True)
+        self._thread.start()
+        print(f"🧪 Mock OpenRouter listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        print(f"🧪 Mock OpenRouter listening on {self.base_url}")
+        self._server.serve_forever()
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON body"}})
+                    return
+                with mock._lock:
+                    mock.requests_served += 1
+                mock._respond(self, body)
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _respond(self, handler, body: dict):
+        model_id = body.get("model", "")
+        profile = self.profile(model_id)
+
+        # Failures that come back quickly, as they do from the real API
+        if self._roll(profile["rate_limit_rate"]):
+            handler._send_json(429, {"error": {"code": 429, "message": "Rate limit exceeded"}},
+                               {"Retry-After": profile["retry_after"], "X-RateLimit-Remaining": 0})
+            return
+        if self._roll(profile["moderation_rate"]):
+            handler._send_json(403, {"error": {"code": 403, "message": "Input was flagged by moderation",
+                                               "metadata": {"reasons": ["harassment"], "flagged_input": ""}}})
+            return
+        latency = self._latency(profile)
+        if self._roll(profile["error_rate"]):
+            time.sleep(latency / 2)
+            handler._send_json(500, {"error": {"code": 500, "message": "Upstream provider error"}})
+            return
+
+        content = self._content(body, profile)
+        if body.get("stream"):
+            self._stream(handler, model_id, content, latency, profile)
+            return
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        completion_tokens = len(content) // 4 + 1
+        self._send_completion(handler, latency, {
+            "id": f"gen-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model_id,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        })
+
+    def _send_completion(self, handler, latency: float, payload: dict):
+        """Send headers at once, whitespace while the model "runs", then the JSON body
+
+        Matches OpenRouter, which keeps non-streamed connections alive with
+        whitespace, and stops early when the client hangs up.
+        """
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        try:
+            handler.wfile.flush()
+            ends_at = time.monotonic() + latency
+            while time.monotonic() < ends_at:
+                time.sleep(min(0.25, max(0.0, ends_at - time.monotonic())))
+                handler.wfile.write(b"\n")
+                handler.wfile.flush()
+            handler.wfile.write(json.dumps(payload).encode("utf-8"))
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled or timed out
+
+    def _content(self, body: dict, profile: dict) -> str:
+        """Assistant text: a plausible JSON answer, a refusal or malformed output"""
+        if self._roll(profile["refusal_rate"]):
+            return "I'm sorry, but I can't help with that request."
+        messages = body.get("messages") or [{}]
+        prompt = str(messages[-1].get("content", ""))
+        match = _QUOTED_MESSAGE.search(prompt)
+        original = match.group(1) if match else prompt
+        answer = json.dumps({
+            "transformed_message": f"I feel hurt, and I want us to understand each other: {original}",
+            "healing_score": 7,
+            "sentiment": "positive",
+            "emotional_state": "caring",
+            "explanation": "Mock response from the local OpenRouter stand-in"
+        })
+        if self._roll(profile["malformed_rate"]):
+            return "Sure! Here you go: " + answer[:len(answer) // 3].replace('"', "")
+        return answer
+
+    def _stream(self, handler, model_id: str, content: str, latency: float, profile: dict):
+        """Send the answer as server-sent events spread across the latency"""
+        size = max(1, profile["stream_chunk_chars"])
+        chunks = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        try:
+            # OpenRouter sends comment lines while the model is queued
+            handler.wfile.write(b": OPENROUTER PROCESSING\n\n")
+            handler.wfile.flush()
+            time.sleep(latency / 3)
+            pause = (latency * 2 / 3) / len(chunks)
+            for index, chunk in enumerate(chunks):
+                event = {
+                    "id": "gen-mock", "object": "chat.completion.chunk", "model": model_id,
+                    "choices": [{"index": 0, "delta": {"content": chunk},
+                                 "finish_reason": "stop" if index == len(chunks) - 1 else None}]
+                }
+                handler.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                handler.wfile.flush()
+                time.sleep(pause)
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled or timed out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in with latency and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help='JSON file: {"default": {...}, "models": {"model/id": {...}}}')
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible fault sequences")
+    args = parser.parse_args()
+
+    profiles = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            profiles = json.load(f)
+    MockOpenRouter(args.host, args.port, profiles, args.seed).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
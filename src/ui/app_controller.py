@@ -20,7 +20,7 @@ class ThirdVoiceApp:
         self.auth_ui = AuthenticationUI(self.auth_manager)
         self.onboarding = OnboardingFlow(self.db, self.ai_engine)
         self.dashboard = Dashboard(self.db, self.ai_engine)
-        self.admin_dashboard = AdminDashboard(self.db)
+        self.admin_dashboard = AdminDashboard(self.db, self.ai_engine)
     
     def run(self):
         """Main application entry point"""
@@ -83,12 +83,13 @@ def run_app():
     try:
         # Import here to avoid circular imports
         from ..data.database import DatabaseManager
-        from ..core.ai_engine import AIEngine
+        from ..core.ai_engine import get_ai_engine
         from ..auth.auth_manager import AuthManager
         
         # Initialize components
         db = DatabaseManager()
-        ai_engine = AIEngine()
+        ai_engine = get_ai_engine()  # Shared across reruns and sessions
+        db.add_message_listener(ai_engine.record_saved_message)  # Keep contact summaries current
         auth_manager = AuthManager(db)
         
         # Create and run app
@@ -335,6 +335,16 @@ class UIComponents:
         </div>
         """, unsafe_allow_html=True)
     
+    @staticmethod
+    def render_draft_preview(draft_response):
+        """Render the instant local draft shown while the model answer is on its way"""
+        st.caption("✏️ Quick draft - The Third Voice is refining it...")
+        st.markdown(f"""
+        <div style='background: #f8f9fa; padding: 1rem 1.5rem; border-radius: 12px; border-left: 4px dashed #adb5bd; margin: 0.5rem 0; color: #555;'>
+            {draft_response.transformed_message}
+        </div>
+        """, unsafe_allow_html=True)
+    
     @staticmethod
     def render_copy_button_with_message(message_text, button_key, success_key):
         """Render a copy button with success feedback"""
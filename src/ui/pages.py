@@ -8,6 +8,8 @@ import streamlit as st
 import uuid
 from typing import List, Optional, Tuple
 from ..core.ai_engine import MessageType, RelationshipContext
+from ..core.job_pool import JobStatus
+from ..config.settings import AppConfig
 from ..data.models import Contact, Message
 from .components import UIComponents
 
@@ -298,6 +300,14 @@ class OnboardingFlow:
         
         temp_contact_id = str(uuid.uuid4())
         
+        # Instant local draft while the model works
+        draft_slot = st.empty()
+        if AppConfig.PROGRESSIVE_DRAFT_ENABLED:
+            with draft_slot.container():
+                UIComponents.render_draft_preview(
+                    self.ai_engine.draft_response(message_data["message"], message_data["type"])
+                )
+        
         with st.spinner("The Third Voice is thinking..."):
             ai_response = self.ai_engine.process_message(
                 message_data["message"],
@@ -307,6 +317,7 @@ class OnboardingFlow:
                 user_id,
                 self.db
             )
+        draft_slot.empty()
         
         UIComponents.render_ai_response(ai_response, message_data["type"])
         
@@ -486,6 +497,10 @@ class Dashboard:
                     key="transform_btn"):
             self._process_demo_message(user_id, contact, transform_message, 
                                      MessageType.TRANSFORM.value, auth_manager)
+        
+        finished = self._collect_job(f"demo_{MessageType.TRANSFORM.value}")
+        if finished:
+            self._show_demo_result(user_id, contact, *finished)
     
     def _render_interpret_mode(self, user_id: str, contact: Contact, auth_manager):
         """Render interpret mode section"""
@@ -514,16 +529,32 @@ class Dashboard:
                     key="interpret_btn"):
             self._process_demo_message(user_id, contact, interpret_message, 
                                      MessageType.INTERPRET.value, auth_manager)
+        
+        finished = self._collect_job(f"demo_{MessageType.INTERPRET.value}")
+        if finished:
+            self._show_demo_result(user_id, contact, *finished)
     
     def _process_demo_message(self, user_id: str, contact: Contact, message: str, 
                             message_type: str, auth_manager):
         """Process message with streamlined demo experience"""
         
-        with st.spinner("🎭 The Third Voice is working its magic..."):
-            ai_response = self.ai_engine.process_message(
-                message, contact.context, message_type, contact.id, user_id, self.db
-            )
+        if self._start_job(f"demo_{message_type}", user_id, contact, message, message_type):
+            return
         
+        if AppConfig.STREAMING_ENABLED:
+            ai_response = self._stream_ai_response(user_id, contact, message, message_type)
+        else:
+            draft_slot = self._render_draft(message, message_type)
+            with st.spinner("🎭 The Third Voice is working its magic..."):
+                ai_response = self.ai_engine.process_message(
+                    message, contact.context, message_type, contact.id, user_id, self.db
+                )
+            draft_slot.empty()
+        
+        self._show_demo_result(user_id, contact, message, message_type, ai_response)
+    
+    def _show_demo_result(self, user_id: str, contact: Contact, message: str, message_type: str, ai_response):
+        """Display and save a finished demo response"""
         # Display results with enhanced demo styling
         UIComponents.render_demo_ai_response(ai_response, message_type)
         
@@ -536,6 +567,103 @@ class Dashboard:
         if success:
             st.success("💾 Added to your demo session!")
     
+    def _start_job(self, slot: str, user_id: str, contact: Contact, message: str, message_type: str) -> bool:
+        """Hand the message to the engine's background workers; False means process it inline"""
+        if not AppConfig.BACKGROUND_JOBS_ENABLED:
+            return False
+        # A new Send replaces the slot's running request, so stop that one from using a worker
+        previous = st.session_state.get("ai_jobs", {}).pop(slot, None)
+        if previous:
+            previous["cancel_token"].cancel()
+        job = self.ai_engine.submit_message(message, contact.context, message_type, contact.id, user_id, self.db)
+        if job is None:
+            return False
+        draft = self.ai_engine.draft_response(message, message_type) if AppConfig.PROGRESSIVE_DRAFT_ENABLED else None
+        st.session_state.setdefault("ai_jobs", {})[slot] = {
+            "job_id": job.id, "cancel_token": job.cancel_token,
+            "message": message, "message_type": message_type, "draft": draft
+        }
+        return True
+    
+    def _cancel_jobs(self, keep: Optional[str] = None, keep_type: Optional[str] = None):
+        """Cancel this session's background jobs, except the one in slot keep if it is for keep_type"""
+        jobs = st.session_state.get("ai_jobs", {})
+        for slot in list(jobs):
+            if slot == keep and jobs[slot]["message_type"] == keep_type:
+                continue
+            jobs.pop(slot)["cancel_token"].cancel()
+    
+    def _collect_job(self, slot: str) -> Optional[Tuple[str, str, object]]:
+        """Show progress for the slot's background job; returns (message, message_type, ai_response) once done"""
+        entry = st.session_state.get("ai_jobs", {}).get(slot)
+        if not entry:
+            return None
+        job = self.ai_engine.get_job(entry["job_id"])
+        if job is not None and not job.done:
+            self._render_job_progress(slot)
+            return None
+        
+        del st.session_state.ai_jobs[slot]
+        if job is None:
+            st.warning("⌛ That request expired before it was shown - please try again.")
+            return None
+        ai_response = job.result
+        if job.status is JobStatus.FAILED or ai_response is None:
+            ai_response = self.ai_engine.draft_response(entry["message"], entry["message_type"])
+        return entry["message"], entry["message_type"], ai_response
+    
+    @st.fragment(run_every=AppConfig.JOB_POLL_INTERVAL_SECONDS)
+    def _render_job_progress(self, slot: str):
+        """Auto-refreshing job progress; reruns the page once the job has finished"""
+        entry = st.session_state.get("ai_jobs", {}).get(slot)
+        job = self.ai_engine.get_job(entry["job_id"]) if entry else None
+        if job is None or job.done:
+            st.rerun()
+        
+        if job.partial:
+            st.caption("🎙️ The Third Voice is writing...")
+            st.markdown(job.partial)
+        elif entry["draft"] is not None:
+            UIComponents.render_draft_preview(entry["draft"])
+        else:
+            st.caption("🎙️ The Third Voice is thinking...")
+        
+        if st.button("✖️ Cancel", key=f"cancel_{slot}"):
+            st.session_state.ai_jobs.pop(slot)["cancel_token"].cancel()
+            st.rerun()
+    
+    def _render_draft(self, message: str, message_type: str):
+        """Show the instant local draft; returns its slot so the real answer can replace it"""
+        draft_slot = st.empty()
+        if AppConfig.PROGRESSIVE_DRAFT_ENABLED:
+            with draft_slot.container():
+                UIComponents.render_draft_preview(self.ai_engine.draft_response(message, message_type))
+        return draft_slot
+    
+    def _stream_ai_response(self, user_id: str, contact: Contact, message: str, message_type: str):
+        """Show the suggested message word by word, then return the full AI response"""
+        draft_slot = self._render_draft(message, message_type)
+        placeholder = st.empty()
+        stream = self.ai_engine.stream_message(
+            message, contact.context, message_type, contact.id, user_id, self.db
+        )
+        
+        def live_text():
+            # The draft stays up until the model's first words arrive
+            for index, chunk in enumerate(stream):
+                if index == 0:
+                    draft_slot.empty()
+                yield chunk
+        
+        with placeholder.container():
+            st.caption("🎙️ The Third Voice is writing...")
+            st.write_stream(live_text())
+        
+        # The full response is rendered in place of the live preview
+        draft_slot.empty()
+        placeholder.empty()
+        return stream.response
+    
     def _render_strategic_upgrade_prompt(self):
         """Show strategic upgrade prompt after user is engaged"""
         st.markdown("""
@@ -691,6 +819,9 @@ class Dashboard:
         
         message_type = MessageType.TRANSFORM.value if "Transform" in mode else MessageType.INTERPRET.value
         
+        # Switching contact or mode abandons requests made for the previous one
+        self._cancel_jobs(keep=f"regular_{contact.id}", keep_type=message_type)
+        
         # Message input
         if message_type == MessageType.TRANSFORM.value:
             placeholder = f"What do you want to tell {contact.name}?\n\nExample: 'I'm frustrated that you're always late'"
@@ -711,6 +842,13 @@ class Dashboard:
         # Process button
         if st.button("🎙️ Get Third Voice Help", use_container_width=True, type="primary", disabled=not message):
             self._process_regular_message(user_id, contact, message, message_type, auth_manager)
+        elif f"regular_{contact.id}" not in st.session_state.get("ai_jobs", {}):
+            # The text area reports its value on blur or Ctrl+Enter; start answering it before Send is clicked
+            self.ai_engine.speculate(message, contact.context, message_type, contact.id, user_id, self.db)
+        
+        finished = self._collect_job(f"regular_{contact.id}")
+        if finished:
+            self._show_regular_result(user_id, contact, *finished)
         
         # Show conversation history
         self._render_conversation_history(user_id, contact, auth_manager)
@@ -718,11 +856,26 @@ class Dashboard:
     def _process_regular_message(self, user_id: str, contact: Contact, message: str, message_type: str, auth_manager):
         """Process message for regular users"""
         
-        with st.spinner("The Third Voice is thinking..."):
-            ai_response = self.ai_engine.process_message(
-                message, contact.context, message_type, contact.id, user_id, self.db
-            )
+        # The sent text stays in the box; don't answer it again speculatively on later reruns
+        self.ai_engine.mark_sent(message, contact.context, message_type, user_id)
         
+        if self._start_job(f"regular_{contact.id}", user_id, contact, message, message_type):
+            return
+        
+        if AppConfig.STREAMING_ENABLED:
+            ai_response = self._stream_ai_response(user_id, contact, message, message_type)
+        else:
+            draft_slot = self._render_draft(message, message_type)
+            with st.spinner("The Third Voice is thinking..."):
+                ai_response = self.ai_engine.process_message(
+                    message, contact.context, message_type, contact.id, user_id, self.db
+                )
+            draft_slot.empty()
+        
+        self._show_regular_result(user_id, contact, message, message_type, ai_response)
+    
+    def _show_regular_result(self, user_id: str, contact: Contact, message: str, message_type: str, ai_response):
+        """Display and save a finished response, then offer feedback"""
         # Display results
         UIComponents.render_ai_response(ai_response, message_type)
         
@@ -783,8 +936,9 @@ class Dashboard:
 class AdminDashboard:
     """Admin dashboard for viewing feedback and analytics"""
     
-    def __init__(self, db):
+    def __init__(self, db, ai_engine=None):
         self.db = db
+        self.ai_engine = ai_engine
     
     def run(self, user_id: str, auth_manager):
         """Run admin dashboard - only for admin users"""
@@ -803,7 +957,9 @@ class AdminDashboard:
         st.markdown("**For Samantha! For every family!** 💪")
         
         # Tabs for different admin views
-        tab1, tab2, tab3 = st.tabs(["📊 Feedback Overview", "💬 Detailed Feedback", "📈 Analytics"])
+        tab1, tab2, tab3, tab4 = st.tabs(
+            ["📊 Feedback Overview", "💬 Detailed Feedback", "📈 Analytics", "⚡ Model Performance"]
+        )
         
         with tab1:
             self._render_feedback_overview()
@@ -813,6 +969,9 @@ class AdminDashboard:
         
         with tab3:
             self._render_analytics()
+        
+        with tab4:
+            self._render_model_performance()
     
     def _render_feedback_overview(self):
         """Render feedback overview with key metrics"""
@@ -992,6 +1151,51 @@ class AdminDashboard:
                 summary = self._generate_summary(feedback_data)
                 st.code(summary)
     
+    def _render_model_performance(self):
+        """Render per-model request, latency and token metrics for this process"""
+        st.subheader("⚡ Model Performance")
+        
+        if self.ai_engine is None:
+            st.warning("AI engine not available")
+            return
+        
+        metrics = self.ai_engine.metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Responses", int(metrics.responses.total()))
+        with col2:
+            st.metric("Fallback Rate", f"{metrics.fallback_rate() * 100:.1f}%")
+        with col3:
+            st.metric("Cache Hit Rate", f"{metrics.cache_hit_rate() * 100:.1f}%")
+        
+        summary = metrics.model_summary()
+        if not summary:
+            st.info("No model calls since this server started")
+        else:
+            health = self.ai_engine.scoreboard.snapshot()
+            rows = []
+            for model_id, stats in sorted(summary.items(), key=lambda item: -item[1]["requests"]):
+                p50, p95, queue_p95 = stats["p50_seconds"], stats["p95_seconds"], stats["queue_p95_seconds"]
+                rows.append({
+                    "Model": self.ai_engine._get_model_display_name(model_id),
+                    "Requests": int(stats["requests"]),
+                    "Success": f"{stats['success_rate'] * 100:.0f}%",
+                    "429s": int(stats["rate_limited"]),
+                    "Errors": int(stats["errors"]),
+                    "Parse Failures": int(stats["parse_failures"]),
+                    "p50 (s)": f"{p50:.1f}" if p50 is not None else "-",
+                    "p95 (s)": f"{p95:.1f}" if p95 is not None else "-",
+                    "Queue p95 (s)": f"{queue_p95:.2f}" if queue_p95 is not None else "-",
+                    "Rate-limit Skips": int(stats["rate_limit_skips"]),
+                    "Tokens": int(stats["tokens"]),
+                    "Circuit": health.get(model_id, {}).get("circuit", "-")
+                })
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        
+        st.caption(f"Prometheus endpoint: http://{AppConfig.METRICS_SERVER_HOST}:{AppConfig.METRICS_SERVER_PORT}/metrics")
+        with st.expander("Raw metrics"):
+            st.code(metrics.render(), language="text")
+    
     def _get_all_feedback(self):
         """Get all feedback from database"""
         try: